@@ -2,6 +2,8 @@ import asyncio
 import numpy as np
 from passlib.context import CryptContext
 from datetime import datetime, date
+from sqlalchemy.future import select
+from backend.models.models import Movie, Poster
 
 pwd_context = CryptContext(schemes=["bcrypt"],
                            bcrypt__rounds=10, deprecated="auto")
@@ -12,21 +14,47 @@ async def hash_password(password: str):
 async def verify(plain_password, hashed_password):
     return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
 
+def _serialize_value(value):
+    # Convert datetime fields to string
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    # Convert date fields (like release_date) to "YYYY-MM-DD"
+    elif isinstance(value, date):
+        value = value.strftime("%Y-%m-%d")
+    # Convert NumPy arrays (like embedding) to lists
+    elif isinstance(value, np.ndarray):
+        value = value.tolist()
+    return value
+
 def to_dict(obj):
     data = {}
     for column in obj.__table__.columns:
-        value = getattr(obj, column.name)
-        
-        # Convert datetime fields to string
-        if isinstance(value, datetime):
-            value = value.isoformat()
-        # Convert date fields (like release_date) to "YYYY-MM-DD"
-        elif isinstance(value, date):
-            value = value.strftime("%Y-%m-%d")
-        # Convert NumPy arrays (like embedding) to lists
-        elif isinstance(value, np.ndarray):
-            value = value.tolist()
-
-        data[column.name] = value
+        data[column.name] = _serialize_value(getattr(obj, column.name))
     
-    return data
\ No newline at end of file
+    return data
+
+def projection(model, schema) -> list:
+    """Columns of `model` that `schema` returns, for column-level selects.
+
+    Keeps unused columns (like the 768-float embedding) out of both the query
+    and anything cached from it.
+    """
+    return [getattr(model, name) for name in model.__table__.columns.keys() if name in schema.model_fields]
+
+def primary_poster():
+    """The movie's first poster as a `poster_url` column.
+
+    A correlated LIMIT 1 lookup on the (movie_id, poster_id) index, so a movie
+    with several posters still comes back as one row.
+    """
+    return (select(Poster.image_path)
+            .where(Poster.movie_id == Movie.movie_id)
+            .order_by(Poster.poster_id)
+            .limit(1)
+            .correlate(Movie)
+            .scalar_subquery()
+            .label("poster_url"))
+
+def row_to_dict(row) -> dict:
+    # Works on the Row objects returned by a select(*projection(...))
+    return {key: _serialize_value(value) for key, value in row._mapping.items()}
\ No newline at end of file
@@ -0,0 +1,59 @@
+import time
+
+class CircuitBreaker:
+    """Stops calling a failing dependency, then lets one probe through to test recovery.
+
+    closed: calls go through. open: calls are skipped until `reset_timeout`
+    has passed. half_open: a single probe call decides between the two.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0, name: str = "redis") -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.total_failures = 0
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self):
+        if self.state != "closed":
+            print(f"{self.name} recovered, closing circuit breaker")
+        self.state = "closed"
+        self.failures = 0
+        self.probing = False
+
+    def abandon(self):
+        # A probe that was cancelled proves nothing either way
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.total_failures += 1
+        self.probing = False
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            if self.state == "closed":
+                print(f"{self.name} failing, opening circuit breaker after {self.failures} errors")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "total_failures": self.total_failures,
+            "short_circuited": self.short_circuited,
+        }
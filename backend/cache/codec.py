@@ -0,0 +1,133 @@
+import os
+import zlib
+import ujson
+from typing import Any, Optional
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # optional dependency, falls back to ujson
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # optional dependency
+    lz4_frame = None
+
+load_dotenv()
+# orjson | msgpack | json
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "orjson")
+# zstd | lz4 | zlib | none
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zstd")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024))
+
+# Encoded values are <version><serializer><compression><payload>. Legacy
+# entries are plain ujson text, which never starts with the version byte.
+CODEC_VERSION = 1
+
+SERIALIZER_JSON = 1
+SERIALIZER_MSGPACK = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_LZ4 = 3
+
+def _dumps_json(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    return ujson.dumps(value).encode()
+
+def _loads_json(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else ujson.loads(data)
+
+def _compress(method: int, data: bytes) -> bytes:
+    if method == COMPRESSION_ZSTD:
+        assert zstandard is not None
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if method == COMPRESSION_LZ4:
+        assert lz4_frame is not None
+        return lz4_frame.compress(data)
+    return zlib.compress(data, 6)
+
+def _decompress(method: int, data: bytes) -> bytes:
+    if method == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd-compressed cache entry but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if method == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise ValueError("lz4-compressed cache entry but lz4 is not installed")
+        return lz4_frame.decompress(data)
+    if method == COMPRESSION_ZLIB:
+        return zlib.decompress(data)
+    return data
+
+def _resolve_serializer(name: str) -> int:
+    if name == "msgpack" and msgpack is not None:
+        return SERIALIZER_MSGPACK
+    return SERIALIZER_JSON
+
+def _resolve_compression(name: str) -> int:
+    # Fall back to zlib rather than silently storing large values uncompressed
+    if name == "none":
+        return COMPRESSION_NONE
+    if name == "zstd" and zstandard is not None:
+        return COMPRESSION_ZSTD
+    if name == "lz4" and lz4_frame is not None:
+        return COMPRESSION_LZ4
+    return COMPRESSION_ZLIB
+
+class CacheCodec:
+    """Encodes cache values to versioned bytes, compressing large ones."""
+
+    def __init__(self, serializer: str = CACHE_SERIALIZER, compression: str = CACHE_COMPRESSION,
+                 compress_min_bytes: int = CACHE_COMPRESS_MIN_BYTES) -> None:
+        self.serializer = _resolve_serializer(serializer)
+        self.compression = _resolve_compression(compression)
+        self.compress_min_bytes = compress_min_bytes
+
+    def encode(self, value: Any) -> bytes:
+        if self.serializer == SERIALIZER_MSGPACK:
+            assert msgpack is not None
+            payload = msgpack.packb(value, use_bin_type=True)
+        else:
+            payload = _dumps_json(value)
+
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.compress_min_bytes:
+            compressed = _compress(self.compression, payload)
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+
+        return bytes((CODEC_VERSION, self.serializer, compression)) + payload
+
+    def decode(self, data: Optional[bytes]) -> Any:
+        if not data:
+            return None
+        if isinstance(data, str):
+            return ujson.loads(data)
+        if data[0] != CODEC_VERSION:
+            # Written before the codec existed
+            return _loads_json(data)
+
+        serializer, compression = data[1], data[2]
+        payload = _decompress(compression, data[3:])
+        if serializer == SERIALIZER_MSGPACK:
+            if msgpack is None:
+                raise ValueError("msgpack cache entry but msgpack is not installed")
+            return msgpack.unpackb(payload, raw=False)
+        return _loads_json(payload)
+
+
+codec = CacheCodec()
@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+class LocalCache:
+    """Size-bounded in-process LRU with per-entry expiry.
+
+    Sits in front of Redis; entries live for at most `max_ttl` seconds so a
+    missed invalidation can only serve stale data briefly.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_ttl: float = 5.0) -> None:
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        if ttl <= 0:
+            return
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str):
+        # A trailing * drops every key with that prefix
+        if key.endswith("*"):
+            prefix = key[:-1]
+            for cached_key in [k for k in self.entries if k.startswith(prefix)]:
+                del self.entries[cached_key]
+        else:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+        }
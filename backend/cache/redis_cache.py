@@ -1,129 +1,648 @@
 import os
+import re
+import time
+import uuid
+import hashlib
 import ujson
+import asyncio
 import redis.asyncio as redis
-from typing import Optional, Union
+from redis.exceptions import RedisError
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar, Union
 from dotenv import load_dotenv
 from sqlalchemy.future import select
 from backend.database.database import AsyncSessionLocal
 from backend.models.models import Movie
-from backend.auth.utils import to_dict
+from backend.auth.utils import primary_poster, projection, row_to_dict
+from backend.database.schemas import MovieResponse
+from backend.cache.local_cache import LocalCache
+from backend.cache.codec import codec
+from backend.cache.circuit_breaker import CircuitBreaker
 
 load_dotenv()
 REDIS_HOST = os.getenv("REDIS_HOST")
 REDIS_PORT = os.getenv("REDIS_PORT")
+# Per-operation budgets; a slow Redis counts as a failed one
+REDIS_OP_TIMEOUT = float(os.getenv("REDIS_OP_TIMEOUT", 0.25))
+REDIS_BULK_TIMEOUT = float(os.getenv("REDIS_BULK_TIMEOUT", 5.0))
+REDIS_FAILURE_THRESHOLD = int(os.getenv("REDIS_FAILURE_THRESHOLD", 5))
+REDIS_RESET_SECONDS = float(os.getenv("REDIS_RESET_SECONDS", 10))
+# Coordinate cache misses across workers too, not just within one process
+SINGLE_FLIGHT_REDIS_LOCK = os.getenv("SINGLE_FLIGHT_REDIS_LOCK", "false").lower() == "true"
+SINGLE_FLIGHT_LOCK_TTL_MS = int(os.getenv("SINGLE_FLIGHT_LOCK_TTL_MS", 10000))
+SINGLE_FLIGHT_POLL_SECONDS = 0.05
+# In-process L1 tier in front of Redis; L1_CACHE_SIZE=0 disables it
+L1_CACHE_SIZE = int(os.getenv("L1_CACHE_SIZE", 1024))
+L1_CACHE_TTL = float(os.getenv("L1_CACHE_TTL", 5))
+INVALIDATION_CHANNEL = "cache:invalidate"
+# background: warm the catalog after startup, blocking: before serving, off: skip
+CACHE_PRELOAD = os.getenv("CACHE_PRELOAD", "background").lower()
+# Rows fetched per round trip while preloading; a multiple of the page size
+PRELOAD_BATCH_ROWS = int(os.getenv("PRELOAD_BATCH_ROWS", 1000))
+# Page size of the preloaded catalog; other sizes get their own keys
+DEFAULT_PER_PAGE = 50
+# Commands sent per pipeline round trip by the batched writers
+PIPELINE_CHUNK = 500
+# Tag sets map a tag (e.g. movie:42, genre:action) to the cache keys built from it;
+# they outlive any entry TTL and are emptied when the tag is invalidated
+TAG_EXPIRE = 86400
+# Entries written with a soft_ttl are wrapped as {SOFT_EXPIRY_FIELD: ts, "value": ...}
+SOFT_EXPIRY_FIELD = "__soft_expires_at"
+
+# Delete the lock only if this worker still owns it
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+T = TypeVar("T")
 
 class RedisCache:
     def __init__(self) -> None:
         self.redis: Optional[redis.Redis] = None
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.local: Optional[LocalCache] = LocalCache(L1_CACHE_SIZE, L1_CACHE_TTL) if L1_CACHE_SIZE > 0 else None
+        self.instance_id = uuid.uuid4().hex
+        self.invalidation_task: Optional[asyncio.Task] = None
+        # Called with every message other workers publish on INVALIDATION_CHANNEL
+        self.listeners: list[Callable[[dict], None]] = []
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.refresh_tasks: dict[str, asyncio.Task] = {}
+        self.stale_hits = 0
+        self.preload_task: Optional[asyncio.Task] = None
+        self.preload_ready = False
+        self.preloaded_movies = 0
+        self.breaker = CircuitBreaker(REDIS_FAILURE_THRESHOLD, REDIS_RESET_SECONDS)
 
-    async def connect(self):
-        try:
-            if REDIS_PORT is None:
-                raise ValueError("REDIS_PORT is None")
-            if REDIS_HOST is None:
-                raise ValueError("REDIS_HOST is None")
-
-            self.redis = redis.Redis(
-                host=REDIS_HOST,
-                port=int(REDIS_PORT),
-                decode_responses=True,
-                max_connections=100,
-                socket_keepalive=True,
-            )
+    async def connect(self, bare: bool = False):
+        """Open the client; unless bare, also start the pub/sub listener and the catalog preload.
 
-            await self.preload_movies()
+        Scripts and batch jobs should connect bare.
+        """
+        if REDIS_PORT is None:
+            raise ValueError("REDIS_PORT is None")
+        if REDIS_HOST is None:
+            raise ValueError("REDIS_HOST is None")
 
-        except Exception as e:
-            raise RuntimeError(f"Failed to connect to Redis: {e}")
+        self.redis = redis.Redis(
+            host=REDIS_HOST,
+            port=int(REDIS_PORT),
+            # Values are codec bytes, see backend/cache/codec.py
+            decode_responses=False,
+            max_connections=100,
+            socket_keepalive=True,
+            socket_connect_timeout=REDIS_OP_TIMEOUT * 4,
+        )
+
+        # An unreachable Redis degrades the cache instead of failing startup
+        if not await self._guard(self.redis.ping, False):
+            print("Redis unreachable, starting in degraded mode (serving from the database)")
+
+        if bare:
+            return
+
+        self.invalidation_task = asyncio.create_task(self._listen_invalidations())
+
+        if CACHE_PRELOAD == "blocking":
+            await self._warm_up()
+        elif CACHE_PRELOAD == "background":
+            # Serve traffic right away; misses fall through to the DB until warm
+            self.preload_task = asyncio.create_task(self._warm_up())
+        else:
+            self.preload_ready = True
 
     def is_connected(self):
         if not self.redis:
             raise RuntimeError("Redis connection not initialized. Call connect() first")
 
-    async def set_cache(self, key: str, value: Union[dict, list], expire: int = 600):
+    async def _guard(self, operation: Callable[[], Awaitable[T]], default: T,
+                     timeout: float = REDIS_OP_TIMEOUT) -> T:
+        """Run a Redis call under a timeout and the circuit breaker; on failure return `default`."""
+        if not self.breaker.allow():
+            return default
+        try:
+            result = await asyncio.wait_for(operation(), timeout)
+        except (RedisError, OSError, asyncio.TimeoutError):
+            self.breaker.record_failure()
+            return default
+        except asyncio.CancelledError:
+            self.breaker.abandon()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def is_degraded(self) -> bool:
+        return self.breaker.state != "closed"
+
+    def health(self) -> dict:
+        return {"degraded": self.is_degraded(), "circuit_breaker": self.breaker.stats()}
+
+    async def _listen_invalidations(self):
+        # Drop L1 entries that another worker overwrote or deleted, and pass the
+        # message on to any other listeners
+        assert self.redis is not None
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Messages sent while we were unsubscribed are lost
+                if self.local is not None:
+                    self.local.clear()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    payload = ujson.loads(message["data"])
+                    if payload["origin"] == self.instance_id:
+                        continue
+                    if self.local is not None:
+                        for key in payload.get("keys", ()):
+                            self.local.invalidate(key)
+                    for listener in self.listeners:
+                        listener(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # L1 entries expire within L1_CACHE_TTL, so resubscribing later is safe
+                print(f"Cache invalidation listener failed, resubscribing: {e}")
+                await asyncio.sleep(REDIS_RESET_SECONDS)
+            finally:
+                await pubsub.close()
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    async def publish_event(self, **fields):
+        """Send a message to every other worker's listeners (best effort, not persisted)."""
+        self.is_connected()
+        assert self.redis is not None
+        message = ujson.dumps({"origin": self.instance_id, **fields})
+        await self._guard(lambda: self.redis.publish(INVALIDATION_CHANNEL, message), None)  #type:ignore
+
+    async def publish_invalidation(self, *keys: str):
+        """Tell other workers to drop keys (a trailing * matches a prefix) from their L1."""
+        if self.local is None:
+            return
+        await self.publish_event(keys=keys)
+
+    def _get_local(self, key: str):
+        return self.local.get(key) if self.local is not None else None
+
+    def _set_local(self, key: str, value, expire: Optional[int] = None):
+        if self.local is not None:
+            # Stay well inside the Redis TTL
+            self.local.set(key, value, ttl=expire / 2 if expire else None)
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"tag:{tag}"
+
+    def _add_tags(self, pipe, key: str, tags: Iterable[str]):
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), key)
+            pipe.expire(self._tag_key(tag), TAG_EXPIRE)
+
+    @staticmethod
+    def _wrap(value, soft_ttl: Optional[int]):
+        if soft_ttl is None:
+            return value
+        return {SOFT_EXPIRY_FIELD: time.time() + soft_ttl, "value": value}
+
+    def _unwrap(self, key: str, value, refresh: Optional[Callable[[], Awaitable]] = None):
+        """Strip the soft-expiry envelope, scheduling `refresh` if the entry is stale."""
+        if not isinstance(value, dict) or SOFT_EXPIRY_FIELD not in value:
+            return value
+        if refresh is not None and value[SOFT_EXPIRY_FIELD] <= time.time():
+            self.stale_hits += 1
+            self._schedule_refresh(key, refresh)
+        return value["value"]
+
+    def _schedule_refresh(self, key: str, refresh: Callable[[], Awaitable]):
+        # One background refresh per key per worker; the caller keeps the stale value
+        if key in self.refresh_tasks:
+            return
+        task = asyncio.create_task(self._refresh(key, refresh))
+        self.refresh_tasks[key] = task
+        task.add_done_callback(lambda _: self.refresh_tasks.pop(key, None))
+
+    async def _refresh(self, key: str, refresh: Callable[[], Awaitable]):
+        assert self.redis is not None
+        client = self.redis
+        lock_key = f"refresh:{key}"
+        token = uuid.uuid4().hex
+        try:
+            # Other workers serving the same stale entry skip the recompute
+            if not await self._guard(lambda: client.set(lock_key, token, nx=True, px=SINGLE_FLIGHT_LOCK_TTL_MS), False):
+                return
+            try:
+                await refresh()
+            finally:
+                await self._guard(lambda: client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token), None)  #type:ignore
+        except Exception as e:
+            print(f"Background refresh failed for {key}: {e}")
+
+    async def set_cache(self, key: str, value: Union[dict, list], expire: int = 600,
+                        tags: Optional[Iterable[str]] = None, soft_ttl: Optional[int] = None):
+        """Store a value; with soft_ttl, readers passing `refresh` revalidate it after soft_ttl seconds."""
         self.is_connected()
         assert self.redis is not None
-        await self.redis.setex(key, expire, ujson.dumps(value))
+        value = self._wrap(value, soft_ttl)
+        data = codec.encode(value)
+
+        async def write():
+            async with self.redis.pipeline(transaction=False) as pipe:  #type:ignore
+                pipe.setex(key, expire, data)
+                self._add_tags(pipe, key, tags or ())
+                await pipe.execute()
+
+        await self._guard(write, None)
+        self._set_local(key, value, expire)
+        await self.publish_invalidation(key)
 
-    async def get_cache(self, key: str) -> Optional[Union[dict, list]]:
+    async def get_cache(self, key: str, refresh: Optional[Callable[[], Awaitable]] = None) -> Optional[Union[dict, list]]:
         self.is_connected()
         assert self.redis is not None
 
-        data = await self.redis.get(key)
-        return ujson.loads(data) if data else None
+        local = self._get_local(key)
+        if local is not None:
+            return self._unwrap(key, local, refresh)
+
+        data = await self._guard(lambda: self.redis.get(key), None)  #type:ignore
+        if not data:
+            self.redis_misses += 1
+            return None
+
+        self.redis_hits += 1
+        value = codec.decode(data)
+        self._set_local(key, value)
+        return self._unwrap(key, value, refresh)
 
     async def delete_cache(self, key: str):
         self.is_connected()
         assert self.redis is not None
-        await self.redis.delete(key)
+        await self._guard(lambda: self.redis.delete(key), None)  #type:ignore
+        if self.local is not None:
+            self.local.invalidate(key)
+        await self.publish_invalidation(key)
+
+    async def mark_missing(self, key: str, expire: int = 60, tags: Optional[Iterable[str]] = None):
+        """Negative-cache a lookup that found nothing, so repeats skip the database."""
+        self.is_connected()
+        assert self.redis is not None
+        redis_key = f"missing:{key}"
+
+        async def write():
+            async with self.redis.pipeline(transaction=False) as pipe:  #type:ignore
+                pipe.setex(redis_key, expire, b"1")
+                self._add_tags(pipe, redis_key, tags or ())
+                await pipe.execute()
+
+        await self._guard(write, None)
+        self._set_local(redis_key, True, expire)
+
+    async def is_missing(self, key: str) -> bool:
+        self.is_connected()
+        assert self.redis is not None
+        redis_key = f"missing:{key}"
+        if self._get_local(redis_key):
+            return True
+        if await self._guard(lambda: self.redis.exists(redis_key), 0):  #type:ignore
+            self._set_local(redis_key, True)
+            return True
+        return False
+
+    async def set_response(self, key: str, body: bytes, expire: int = 600,
+                           tags: Optional[Iterable[str]] = None) -> tuple[str, bytes]:
+        """Cache a rendered JSON body under response:<key>; returns (etag, body).
+
+        Stored as raw bytes, outside the codec, so a hit is served without decoding.
+        """
+        self.is_connected()
+        assert self.redis is not None
+        redis_key = f"response:{key}"
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+        async def write():
+            async with self.redis.pipeline(transaction=False) as pipe:  #type:ignore
+                pipe.setex(redis_key, expire, etag.encode() + b"\n" + body)
+                self._add_tags(pipe, redis_key, tags or ())
+                await pipe.execute()
+
+        await self._guard(write, None)
+        self._set_local(redis_key, (etag, body), expire)
+        await self.publish_invalidation(redis_key)
+        return etag, body
+
+    async def get_response(self, key: str) -> Optional[tuple[str, bytes]]:
+        self.is_connected()
+        assert self.redis is not None
+        redis_key = f"response:{key}"
+
+        local = self._get_local(redis_key)
+        if local is not None:
+            return local
+
+        data = await self._guard(lambda: self.redis.get(redis_key), None)  #type:ignore
+        if not data:
+            self.redis_misses += 1
+            return None
+
+        self.redis_hits += 1
+        etag, body = data.split(b"\n", 1)
+        self._set_local(redis_key, (etag.decode(), body))
+        return etag.decode(), body
+
+    async def mset_with_ttl(self, items: dict[str, Union[dict, list, int]], expire: int = 600,
+                            tags: Optional[dict[str, Iterable[str]]] = None, soft_ttl: Optional[int] = None):
+        """SETEX many keys with a pipeline, PIPELINE_CHUNK keys per round trip.
+
+        `tags` optionally maps a key to the tags it is registered under.
+        """
+        self.is_connected()
+        assert self.redis is not None
+        if not items:
+            return
+
+        items = {key: self._wrap(value, soft_ttl) for key, value in items.items()}
+        keys = list(items)
+
+        async def write(chunk: list[str]):
+            async with self.redis.pipeline(transaction=False) as pipe:  #type:ignore
+                for key in chunk:
+                    pipe.setex(key, expire, codec.encode(items[key]))
+                    if tags and key in tags:
+                        self._add_tags(pipe, key, tags[key])
+                await pipe.execute()
+
+        for start in range(0, len(keys), PIPELINE_CHUNK):
+            chunk = keys[start:start + PIPELINE_CHUNK]
+            await self._guard(lambda: write(chunk), None, timeout=REDIS_BULK_TIMEOUT)
+
+        for key, value in items.items():
+            self._set_local(key, value, expire)
+        await self.publish_invalidation(*keys)
+
+    async def mget_cache(self, keys: list[str]) -> list[Optional[Union[dict, list]]]:
+        """Read several keys in one round trip; missing keys come back as None."""
+        self.is_connected()
+        assert self.redis is not None
+
+        values: list = [self._get_local(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if not missing:
+            return [self._unwrap(key, value) for key, value in zip(keys, values)]
+
+        data = await self._guard(lambda: self.redis.mget([keys[i] for i in missing]), [None] * len(missing))  #type:ignore
+        for i, raw in zip(missing, data):
+            if not raw:
+                self.redis_misses += 1
+                continue
+            self.redis_hits += 1
+            values[i] = codec.decode(raw)
+            self._set_local(keys[i], values[i])
+        return [self._unwrap(key, value) for key, value in zip(keys, values)]
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Delete every key registered under any of the tags; returns how many."""
+        self.is_connected()
+        assert self.redis is not None
+        if not tags:
+            return 0
+
+        tag_keys = [self._tag_key(tag) for tag in tags]
+
+        async def read_tags():
+            async with self.redis.pipeline(transaction=False) as pipe:  #type:ignore
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                return await pipe.execute()
+
+        members = await self._guard(read_tags, None, REDIS_BULK_TIMEOUT)
+        if members is None:
+            raise RuntimeError("Redis unavailable, tags not invalidated")
+
+        keys = list({key.decode() if isinstance(key, bytes) else key for tagged in members for key in tagged})
+        # Entries and their tag sets go in one round trip
+        deleted = await self._guard(lambda: self.redis.delete(*keys, *tag_keys), None, REDIS_BULK_TIMEOUT)  #type:ignore
+
+        if self.local is not None:
+            for key in keys:
+                self.local.invalidate(key)
+        if deleted is None:
+            # Stale entries would otherwise be served until their TTL
+            raise RuntimeError(f"Redis unavailable, {len(keys)} tagged keys not deleted")
+        if keys:
+            await self.publish_invalidation(*keys)
+        return len(keys)
+
+    def cache_stats(self) -> dict:
+        return {
+            "l1": self.local.stats() if self.local is not None else None,
+            "redis": {"hits": self.redis_hits, "misses": self.redis_misses},
+            "stale": {"hits": self.stale_hits, "refreshing": len(self.refresh_tasks)},
+            "preload": {"ready": self.preload_ready, "movies": self.preloaded_movies},
+        }
+
+    async def single_flight(self, key: str, compute: Callable[[], Awaitable[T]],
+                            use_lock: bool = SINGLE_FLIGHT_REDIS_LOCK) -> Union[T, dict, list]:
+        """Run compute() once per key; concurrent callers share its result.
+
+        compute is expected to fill the cache entry for `key` itself. With
+        use_lock, workers that lose the Redis lock poll that entry instead of
+        recomputing it. Its result is shared by every waiter, so it should not
+        use the leading request's DB session.
+        """
+        while (inflight := self.inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only retry when the leader was cancelled, not this caller
+                if not inflight.cancelled() or asyncio.current_task().cancelling():  #type:ignore
+                    raise
+            # The leader's request went away; the first waiter to get here takes over
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting, so mark a stored exception as retrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.inflight[key] = future
+        try:
+            result = await self._compute_once(key, compute, use_lock)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self.inflight[key]
+
+    async def _compute_once(self, key: str, compute: Callable[[], Awaitable[T]], use_lock: bool):
+        # Without Redis there is no one to coordinate with
+        if not use_lock or self.is_degraded():
+            return await compute()
+
+        self.is_connected()
+        assert self.redis is not None
+        client = self.redis
+
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        deadline = asyncio.get_running_loop().time() + SINGLE_FLIGHT_LOCK_TTL_MS / 1000
+        while not await self._guard(lambda: client.set(lock_key, token, nx=True, px=SINGLE_FLIGHT_LOCK_TTL_MS), None):
+            if self.is_degraded():
+                return await compute()
+            # Another worker is computing; wait for its result to land
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+            cached = await self.get_cache(key)
+            if cached is not None:
+                return cached
+            if asyncio.get_running_loop().time() > deadline:
+                return await compute()
+
+        try:
+            # The previous holder may have filled the key right before releasing
+            cached = await self.get_cache(key)
+            if cached is not None:
+                return cached
+            return await compute()
+        finally:
+            await self._guard(lambda: client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token), None)  #type:ignore
+
+    @staticmethod
+    def movies_key_prefix(genre: Optional[str], per_page: int = DEFAULT_PER_PAGE) -> str:
+        prefix = f"movies:{genre if genre else 'all'}"
+        # Pages of another size must not overwrite or be served as the default ones
+        return prefix if per_page == DEFAULT_PER_PAGE else f"{prefix}:per_page:{per_page}"
 
     async def set_movies_cache(
         self,
         genre: Optional[str],
         movies: list,
         expire: int = 600,
-        per_page: int = 50,
+        per_page: int = DEFAULT_PER_PAGE,
+        start_page: int = 1,
+        soft_ttl: Optional[int] = None,
     ):
         self.is_connected()
         assert self.redis is not None
 
-        redis_key_prefix = f"movies:{genre if genre else 'all'}"
+        redis_key_prefix = self.movies_key_prefix(genre, per_page)
+        pages: dict[str, Union[list, int]] = {}
+        tags: dict[str, list[str]] = {}
+        # Multi-genre filters ("action,drama" / "action+drama") are tagged per genre
+        listing_tags = [f"genre:{name}" for name in re.split(r"[,+]", genre.lower())] if genre else ["genre:all"]
 
         for i in range(0, len(movies), per_page):
-            page = i // per_page + 1
+            page = start_page + i // per_page
             redis_key = f"{redis_key_prefix}:page:{page}"
+            pages[redis_key] = movies[i : i + per_page]
+            # Any movie on the page, or a change to the listing, drops the page
+            tags[redis_key] = [*listing_tags, *(f"movie:{movie['movie_id']}" for movie in movies[i : i + per_page])]
 
-            '''movies_serializable = [
-                to_dict(movie) if not isinstance(movie, dict) else movie
-                for movie in movies[i : i + per_page]
-            ]'''
-            await self.redis.setex(redis_key, expire, ujson.dumps(movies[i : i + per_page]))
+        # A single fetched page says nothing about the total
+        if start_page == 1:
+            pages[f"{redis_key_prefix}:total_pages"] = (len(movies) + per_page - 1) // per_page
+            tags[f"{redis_key_prefix}:total_pages"] = listing_tags
 
-        total_pages = (len(movies) + per_page - 1) // per_page
-        await self.redis.setex(
-            f"{redis_key_prefix}:total_pages", expire, total_pages
-        )
+        # All pages go out in pipelined round trips instead of one await per page
+        await self.mset_with_ttl(pages, expire, tags, soft_ttl)
 
-    async def get_movies_cache(self, genre: Optional[str], page: int = 1, per_page: int = 50) -> Optional[list[dict]]:
+    async def get_movies_cache(self, genre: Optional[str], page: int = 1, per_page: int = DEFAULT_PER_PAGE,
+                               refresh: Optional[Callable[[], Awaitable]] = None) -> Optional[list[dict]]:
         self.is_connected()
         assert self.redis is not None
 
-        redis_key = f"movies:{genre if genre else 'all'}:page:{page}"
-        movies_data = await self.redis.get(redis_key)
+        redis_key = f"{self.movies_key_prefix(genre, per_page)}:page:{page}"
+        local = self._get_local(redis_key)
+        if local is not None:
+            return self._unwrap(redis_key, local, refresh)
+
+        movies_data = await self._guard(lambda: self.redis.get(redis_key), None)  #type:ignore
 
         if not movies_data:
+            self.redis_misses += 1
             return None
 
+        self.redis_hits += 1
         try:
-            return ujson.loads(movies_data)
+            movies = codec.decode(movies_data)
         except Exception as e:
             print("Cache decode failed:", e)
             return None
+        self._set_local(redis_key, movies)
+        return self._unwrap(redis_key, movies, refresh)
 
-    async def preload_movies(self):
+    async def _warm_up(self):
+        try:
+            await self.preload_movies()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Movie preload failed: {e}")
+
+    async def preload_movies(self, per_page: int = DEFAULT_PER_PAGE, expire: int = 600, batch_rows: int = PRELOAD_BATCH_ROWS):
+        """Stream the catalog into movies:all pages, one batch of rows in memory at a time."""
         self.is_connected()
         assert self.redis is not None
 
+        if self.is_degraded():
+            print("Redis unavailable, skipping movie preload.")
+            return
+
         # Preload only page 1 as check
-        existing_cache = await self.get_movies_cache(None, 1, 1)
+        existing_cache = await self.get_movies_cache(None, 1, per_page)
         if existing_cache:
             print("Movies already cached.")
+            self.preload_ready = True
             return
 
         print("Preloading movies...")
+        # Whole pages per batch so page boundaries line up
+        batch_rows = max(batch_rows // per_page, 1) * per_page
+        self.preloaded_movies = 0
         async with AsyncSessionLocal() as session:
-            movies = await session.scalars(select(Movie))
-            movies = movies.all()
-            movie_list = [
-                to_dict(movie) if not isinstance(movie, dict) else movie
-                for movie in movies
-            ]
+            # Only the columns get_movies returns, never the embeddings
+            result = await session.stream(
+                select(*projection(Movie, MovieResponse), primary_poster())
+                .order_by(Movie.movie_id)
+                .execution_options(yield_per=batch_rows)
+            )
+            async for rows in result.partitions():
+                await self.set_movies_cache(
+                    None, [row_to_dict(row) for row in rows], expire=expire,
+                    per_page=per_page, start_page=self.preloaded_movies // per_page + 1,
+                )
+                self.preloaded_movies += len(rows)
 
-            await self.set_movies_cache(None, movie_list)
+        # The first batch only knew its own page count
+        total_pages = (self.preloaded_movies + per_page - 1) // per_page
+        total_key = f"{self.movies_key_prefix(None, per_page)}:total_pages"
+        await self.mset_with_ttl({total_key: total_pages}, expire, {total_key: ["genre:all"]})
 
-        print("Movies preloaded successfully.")
+        self.preload_ready = True
+        print(f"Movies preloaded successfully ({self.preloaded_movies} movies).")
 
     async def disconnect(self):
+        for task in list(self.refresh_tasks.values()):
+            task.cancel()
+        if self.preload_task:
+            self.preload_task.cancel()
+            try:
+                await self.preload_task
+            except asyncio.CancelledError:
+                pass
+            self.preload_task = None
+        if self.invalidation_task:
+            self.invalidation_task.cancel()
+            try:
+                await self.invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self.invalidation_task = None
         if self.redis:
             await self.redis.close()
             self.redis = None
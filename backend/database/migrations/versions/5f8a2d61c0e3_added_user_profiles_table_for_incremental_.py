@@ -0,0 +1,43 @@
+"""added user_profiles table for incremental profile embeddings
+
+Revision ID: 5f8a2d61c0e3
+Revises: b3e1c7d9a204
+Create Date: 2025-06-24 10:41:37.502918
+
+"""
+from typing import Sequence, Union
+from pgvector.sqlalchemy import VECTOR
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f8a2d61c0e3'
+down_revision: Union[str, None] = 'b3e1c7d9a204'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_profiles',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('embedding_sum', VECTOR(768), nullable=False),
+    sa.Column('watch_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill running sums from existing watch history
+    op.execute("""
+        INSERT INTO user_profiles (user_id, embedding_sum, watch_count)
+        SELECT wh.user_id, SUM(m.embedding), COUNT(*)
+        FROM watch_history wh
+        JOIN movies m ON m.movie_id = wh.movie_id
+        WHERE m.embedding IS NOT NULL
+        GROUP BY wh.user_id;
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_profiles')
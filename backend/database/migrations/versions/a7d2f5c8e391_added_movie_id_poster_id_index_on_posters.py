@@ -0,0 +1,27 @@
+"""added movie_id poster_id index on posters
+
+Revision ID: a7d2f5c8e391
+Revises: f3c9d7b2e416
+Create Date: 2025-07-03 10:21:08.417265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2f5c8e391'
+down_revision: Union[str, None] = 'f3c9d7b2e416'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Without it every poster lookup is a sequential scan of posters
+    op.create_index('ix_posters_movie_id_poster_id', 'posters', ['movie_id', 'poster_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posters_movie_id_poster_id', table_name='posters')
@@ -0,0 +1,31 @@
+"""added hnsw cosine index on movie embedding
+
+Revision ID: b3e1c7d9a204
+Revises: 728b6e5896da
+Create Date: 2025-06-20 18:04:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e1c7d9a204'
+down_revision: Union[str, None] = '728b6e5896da'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+    # Serves ORDER BY embedding <=> :target LIMIT k
+    op.create_index('ix_movies_embedding_hnsw', 'movies', ['embedding'], unique=False,
+                    postgresql_using='hnsw',
+                    postgresql_with={'m': 16, 'ef_construction': 64},
+                    postgresql_ops={'embedding': 'vector_cosine_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_movies_embedding_hnsw', table_name='movies')
@@ -0,0 +1,33 @@
+"""added movie_neighbors table
+
+Revision ID: c91d4e7f2a58
+Revises: 5f8a2d61c0e3
+Create Date: 2025-06-27 16:12:05.884130
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c91d4e7f2a58'
+down_revision: Union[str, None] = '5f8a2d61c0e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('movie_neighbors',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('neighbor_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('scores', postgresql.ARRAY(postgresql.REAL()), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.movie_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('movie_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('movie_neighbors')
@@ -0,0 +1,43 @@
+"""added full text and trigram search indexes
+
+Revision ID: d4a7e2b9c613
+Revises: c91d4e7f2a58
+Create Date: 2025-06-29 11:37:48.520913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7e2b9c613'
+down_revision: Union[str, None] = 'c91d4e7f2a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    # Titles weigh more than overviews in ts_rank
+    op.add_column('movies', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                    "setweight(to_tsvector('english', coalesce(overview, '')), 'B')", persisted=True),
+        nullable=True))
+    op.create_index('ix_movies_search_vector', 'movies', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+    # Serve fuzzy (%) and ILIKE '%...%' matches without a sequential scan
+    op.create_index('ix_movies_title_trgm', 'movies', ['title'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_movies_genre_trgm', 'movies', ['genre'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'genre': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_movies_genre_trgm', table_name='movies')
+    op.drop_index('ix_movies_title_trgm', table_name='movies')
+    op.drop_index('ix_movies_search_vector', table_name='movies')
+    op.drop_column('movies', 'search_vector')
@@ -0,0 +1,33 @@
+"""added keyset pagination indexes on movies
+
+Revision ID: e8b5c3a1f742
+Revises: d4a7e2b9c613
+Create Date: 2025-07-01 09:22:31.174608
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b5c3a1f742'
+down_revision: Union[str, None] = 'd4a7e2b9c613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One (sort_key, movie_id) index per GET /movies sort, scanned from the cursor onwards
+    op.create_index('ix_movies_vote_count_movie_id', 'movies', ['vote_count', 'movie_id'], unique=False)
+    op.create_index('ix_movies_title_movie_id', 'movies', ['title', 'movie_id'], unique=False)
+    # NULL release dates sort last under DESC and still compare in the row cursor
+    op.create_index('ix_movies_release_date_movie_id', 'movies',
+                    [sa.text("coalesce(release_date, '0001-01-01'::date)"), 'movie_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_movies_release_date_movie_id', table_name='movies')
+    op.drop_index('ix_movies_title_movie_id', table_name='movies')
+    op.drop_index('ix_movies_vote_count_movie_id', table_name='movies')
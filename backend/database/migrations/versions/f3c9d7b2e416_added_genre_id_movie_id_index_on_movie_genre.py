@@ -0,0 +1,53 @@
+"""added genre_id movie_id index on movie_genre
+
+Revision ID: f3c9d7b2e416
+Revises: e8b5c3a1f742
+Create Date: 2025-07-02 14:05:57.641320
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9d7b2e416'
+down_revision: Union[str, None] = 'e8b5c3a1f742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The (movie_id, genre_id) primary key can't serve "movies in genre X" lookups
+    op.create_index('ix_movie_genre_genre_id_movie_id', 'movie_genre', ['genre_id', 'movie_id'], unique=False)
+    # Nothing filters movies.genre with ILIKE any more; writes no longer maintain it
+    op.drop_index('ix_movies_genre_trgm', table_name='movies')
+
+    # Genre filters only read movie_genre; movies created through the API never
+    # got rows there, so backfill them from the comma separated movies.genre
+    op.execute("""
+        INSERT INTO genres (name)
+        SELECT DISTINCT ON (lower(g.name)) g.name
+        FROM movies m
+        CROSS JOIN LATERAL unnest(string_to_array(m.genre, ',')) AS raw(name)
+        CROSS JOIN LATERAL (SELECT btrim(raw.name) AS name) AS g
+        WHERE g.name <> ''
+          AND NOT EXISTS (SELECT 1 FROM genres WHERE lower(genres.name) = lower(g.name))
+        ORDER BY lower(g.name), g.name
+        ON CONFLICT DO NOTHING;
+    """)
+    op.execute("""
+        INSERT INTO movie_genre (movie_id, genre_id)
+        SELECT DISTINCT m.movie_id, genres.id
+        FROM movies m
+        CROSS JOIN LATERAL unnest(string_to_array(m.genre, ',')) AS raw(name)
+        JOIN genres ON lower(genres.name) = lower(btrim(raw.name))
+        ON CONFLICT DO NOTHING;
+    """)
+
+
+def downgrade() -> None:
+    op.create_index('ix_movies_genre_trgm', 'movies', ['genre'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'genre': 'gin_trgm_ops'})
+    op.drop_index('ix_movie_genre_genre_id_movie_id', table_name='movie_genre')
@@ -11,6 +11,12 @@ from contextlib import asynccontextmanager
 from sqlalchemy.sql import text
 from backend.routers import movies, users, auth
 from backend.cache.redis_cache import redis_cache
+from backend.services.ann_index import ann_index
+from backend.services.embedding_store import embedding_store
+from backend.services.similarity import SIMILARITY_BACKEND
+from backend.services.scoring_executor import scoring_executor
+from backend.services.movie_id_filter import movie_id_filter
+from backend.services.autocomplete import autocomplete_index
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,10 +29,23 @@ if not CLIENT_URL:
 async def lifespan(app: FastAPI):
     print("Starting up: Running DB migrations and connecting to Redis...")
     async with engine.begin() as conn:
+        # The models declare gin_trgm_ops indexes, which need the extension first
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
     await redis_cache.connect() #type:ignore
+    if SIMILARITY_BACKEND == "ann":
+        # Built or loaded in the background; the exact scan serves until then
+        ann_index.start()
+    elif SIMILARITY_BACKEND == "memmap":
+        await embedding_store.startup()
+    movie_id_filter.start()
+    autocomplete_index.start()
     yield
     print("Shutting down: Closing DB and Redis connections...")
+    await ann_index.stop()
+    await movie_id_filter.stop()
+    await autocomplete_index.stop()
+    scoring_executor.shutdown()
     await redis_cache.disconnect()
     await engine.dispose()
 
@@ -44,6 +63,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  
     allow_headers=["*"],  
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 app.include_router(movies.router)
@@ -74,4 +94,15 @@ async def test_redis():
 
     retrieved_value = await redis_cache.get_cache(test_key)
 
-    return {"stored_value" : retrieved_value}
\ No newline at end of file
+    return {"stored_value" : retrieved_value, "health": redis_cache.health(), "cache_stats": redis_cache.cache_stats()}
+
+@app.get("/test-scoring")
+async def test_scoring():
+    return {"scoring_executor": scoring_executor.stats(), "movie_id_filter": movie_id_filter.stats()}
+
+@app.get("/ready")
+async def ready():
+    # The catalog cache warms in the background after startup
+    if not redis_cache.preload_ready:
+        return JSONResponse(status_code=503, content={"status": "warming up", "preloaded_movies": redis_cache.preloaded_movies})
+    return {"status": "ready"}
@@ -1,9 +1,10 @@
 from backend.database.database  import Base
-from sqlalchemy.orm import relationship
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Text, DateTime, Date, UniqueConstraint, Index
-from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Text, DateTime, Date, UniqueConstraint, Index, Computed
+from sqlalchemy.sql import func, text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import ARRAY, REAL, TSVECTOR
 from pgvector.sqlalchemy import VECTOR
 
 
@@ -21,9 +22,21 @@ class User(Base):
     reviews = relationship("Review", back_populates="user")
     recommendations = relationship("Recommendation", back_populates="user")
     watch_history = relationship("WatchHistory", back_populates="user", cascade="all, delete")
+    profile = relationship("UserProfile", back_populates="user", uselist=False, cascade="all, delete")
 
 class Movie(Base):
     __tablename__ = "movies"
+    __table_args__ = (
+        Index("ix_movies_embedding_hnsw", "embedding", postgresql_using="hnsw",
+              postgresql_with={"m": 16, "ef_construction": 64},
+              postgresql_ops={"embedding": "vector_cosine_ops"}),
+        Index("ix_movies_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_movies_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        # Keyset pagination, one per sort order of GET /movies
+        Index("ix_movies_vote_count_movie_id", "vote_count", "movie_id"),
+        Index("ix_movies_title_movie_id", "title", "movie_id"),
+        Index("ix_movies_release_date_movie_id", text("coalesce(release_date, '0001-01-01'::date)"), "movie_id"),
+    )
 
     movie_id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -35,6 +48,10 @@ class Movie(Base):
     embedding = Column(VECTOR(768))
     overview = Column(Text, nullable=True)
     tmdb_id = Column(Integer, nullable=True, unique=True)
+    # Maintained by Postgres from title and overview, only read inside search queries
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(overview, '')), 'B')", persisted=True)))
 
     # Relationships
     reviews = relationship("Review", back_populates="movie")
@@ -54,6 +71,10 @@ class Genre(Base):
 
 class MovieGenre(Base):
     __tablename__ = "movie_genre"
+    __table_args__ = (
+        # Genre filters look up movies by genre, the primary key is the other way round
+        Index("ix_movie_genre_genre_id_movie_id", "genre_id", "movie_id"),
+    )
 
     movie_id = Column(Integer, ForeignKey("movies.movie_id", ondelete="CASCADE"), primary_key=True)
     genre_id = Column(Integer, ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True)
@@ -75,6 +96,10 @@ class Review(Base):
 
 class Poster(Base):
     __tablename__ = "posters"
+    __table_args__ = (
+        # primary_poster() reads a movie's first poster straight off this index
+        Index("ix_posters_movie_id_poster_id", "movie_id", "poster_id"),
+    )
     
     poster_id = Column(Integer, primary_key=True, index=True)
     movie_id = Column(Integer, ForeignKey("movies.movie_id"), nullable=False)
@@ -111,4 +136,25 @@ class WatchHistory(Base):
 
     # Relationships
     user = relationship("User", back_populates="watch_history")
-    movie = relationship("Movie", back_populates="watch_history")
\ No newline at end of file
+    movie = relationship("Movie", back_populates="watch_history")
+
+class UserProfile(Base):
+    __tablename__ = "user_profiles"
+
+    # Running sum and count of watched movie embeddings; the profile vector is their mean
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    embedding_sum = Column(VECTOR(768), nullable=False)
+    watch_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    # Relationships
+    user = relationship("User", back_populates="profile")
+
+class MovieNeighbor(Base):
+    __tablename__ = "movie_neighbors"
+
+    # Top-K most similar movies, best first, with their cosine scores
+    movie_id = Column(Integer, ForeignKey("movies.movie_id", ondelete="CASCADE"), primary_key=True)
+    neighbor_ids = Column(ARRAY(Integer), nullable=False)
+    scores = Column(ARRAY(REAL), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
-from backend.database.schemas import MovieCreate, MovieResponse, MovieDetailResponse
+from typing import List, Literal, Optional
+from backend.database.schemas import MovieCreate, MovieResponse, MovieDetailResponse, MovieLite
 from backend.models.models import Movie
 from backend.database.database import get_db
 from backend.database.schemas import TokenData
 from backend.auth.admin import admin_required
-from backend.services.movie_services import MovieService
+from backend.services.movie_services import MovieService, movie_list_adapter
+from backend.services.genre_services import GenreService
+from backend.services.autocomplete import MAX_SUGGESTIONS
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 limiter = Limiter(key_func=get_remote_address)
+# Largest page GET /movies will serve
+MAX_PER_PAGE = 200
+
+def cached_json_response(request: Request, etag: str, body: bytes) -> Response:
+    # Pre-rendered bytes skip response_model validation and re-encoding
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 router = APIRouter(
     prefix = "/movies",
@@ -28,21 +38,40 @@ async def create_movie(request: Request, movie: MovieCreate, db: AsyncSession =
 @router.get("/search", response_model=List[MovieResponse])
 @limiter.limit("50/minute")
 async def search_movies(request: Request, query: Optional[str] = None, genre: Optional[str] = None,
-                         db: AsyncSession = Depends(get_db)):
-    return await MovieService.search_movies(db, query, genre)
+                         genre_match: Literal["any", "all"] = "any", db: AsyncSession = Depends(get_db)):
+    return await MovieService.search_movies(db, query, GenreService.normalize(genre, genre_match == "all"))
+
+#title suggestions for the search box
+@router.get("/autocomplete", response_model=List[MovieLite])
+@limiter.limit("300/minute")
+async def autocomplete(request: Request, q: str, limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+                       db: AsyncSession = Depends(get_db)):
+    return await MovieService.autocomplete(db, q, limit)
 
 #get movie by id
 @router.get("/{movie_id}", response_model=MovieDetailResponse, status_code=200)
 @limiter.limit("50/minute")
 async def get_movie(request: Request, movie_id: int, db : AsyncSession = Depends(get_db)):
-    return await MovieService.get_movie(movie_id, db)
+    etag, body = await MovieService.get_movie_response(movie_id, db)
+    return cached_json_response(request, etag, body)
 
 #get all movies or by genre
 @router.get("/", response_model=List[MovieResponse])
 @limiter.limit("50/minute")
 async def get_movies(request: Request, genre: Optional[str] = None, db: AsyncSession = Depends(get_db),
-                     page: int = 1, per_page: int = 50):    
-    return await MovieService.get_movies(genre, db, page, per_page)
+                     page: int = Query(1, ge=1), per_page: int = Query(50, ge=1, le=MAX_PER_PAGE), sort: Optional[str] = None, cursor: Optional[str] = None,
+                     genre_match: Literal["any", "all"] = "any"):    
+    # genre takes comma separated names; genre_match=all requires every one of them
+    genre = GenreService.normalize(genre, genre_match == "all")
+    # sort/cursor switch to keyset pagination; the next page's cursor is sent in X-Next-Cursor
+    if sort or cursor:
+        movies, next_cursor = await MovieService.get_movies_after(genre, db, sort or "id", cursor, per_page)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return Response(content=movie_list_adapter.dump_json(movie_list_adapter.validate_python(movies)),
+                        media_type="application/json", headers=headers)
+
+    etag, body = await MovieService.get_movies_response(genre, db, page, per_page)
+    return cached_json_response(request, etag, body)
 
 #update movie: will add to admin privilege later
 @router.put("/{movie_id}", response_model=MovieResponse, status_code=200)
@@ -0,0 +1,287 @@
+import os
+import time
+import fcntl
+import asyncio
+import logging
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy.future import select
+from backend.database.database import AsyncSessionLocal
+from backend.models.models import Movie
+from backend.cache.redis_cache import redis_cache
+from backend.services.periodic_index import PeriodicIndex
+
+try:
+    import hnswlib
+except ImportError:  # optional dependency, falls back to the exact scan
+    hnswlib = None
+
+load_dotenv()
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", "data/ann_index.bin")
+ANN_EF_SEARCH = int(os.getenv("ANN_EF_SEARCH", 64))
+ANN_INDEX_REBUILD_SECONDS = float(os.getenv("ANN_INDEX_REBUILD_SECONDS", 3600))
+EMBEDDING_DIM = 768
+
+logger = logging.getLogger(__name__)
+
+class _ReadWriteLock:
+    """Any number of readers, or a single writer."""
+
+    def __init__(self) -> None:
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writing = False
+
+    @contextmanager
+    def read(self):
+        with self.condition:
+            while self.writing:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if not self.readers:
+                    self.condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self.condition:
+            while self.writing or self.readers:
+                self.condition.wait()
+            self.writing = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+class ANNIndex(PeriodicIndex):
+    """In-process HNSW index over Movie.embedding, labelled by movie_id.
+
+    Each worker keeps its own copy. Edits made through MovieService are
+    broadcast so every worker applies them, and the index is rebuilt from the
+    database every ANN_INDEX_REBUILD_SECONDS to pick up movies inserted by
+    scripts. Until the first build finishes, similar movies use the exact scan.
+
+    Queries run on scoring threads and hnswlib's resize_index is not safe
+    alongside knn_query, so queries share a read lock and mutations (applied
+    off the event loop) take the write lock.
+    """
+
+    name = "ANN index"
+
+    def __init__(self, dim: int = EMBEDDING_DIM, m: int = 16, ef_construction: int = 200,
+                 ef_search: int = ANN_EF_SEARCH, build_batch: int = 1000,
+                 rebuild_seconds: float = ANN_INDEX_REBUILD_SECONDS, path: str = ANN_INDEX_PATH) -> None:
+        super().__init__(rebuild_seconds)
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.build_batch = build_batch
+        self.path = path
+        self.index = None
+        self.deleted: set[int] = set()
+        self.lock = _ReadWriteLock()
+        # Broadcast edits being applied in threads
+        self.tasks: set[asyncio.Task] = set()
+
+    def is_ready(self) -> bool:
+        return self.index is not None
+
+    def _new_index(self, max_elements: int):
+        assert hnswlib is not None
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        index.init_index(max_elements=max(max_elements, 1), ef_construction=self.ef_construction, M=self.m)
+        index.set_ef(self.ef_search)
+        return index
+
+    def _ensure_capacity(self, extra: int):
+        assert self.index is not None
+        needed = self.index.get_current_count() + extra
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(needed, self.index.get_max_elements() * 2))
+
+    def start(self):
+        if hnswlib is None:
+            logger.warning("hnswlib is not installed, similar movies will use the exact scan")
+            return
+        redis_cache.add_listener(self._on_event)
+        super().start()
+
+    def _file_is_fresh(self) -> bool:
+        # Saved by another worker during this rebuild interval
+        return os.path.exists(self.path) and time.time() - os.path.getmtime(self.path) < self.rebuild_seconds / 2
+
+    async def _load(self) -> tuple["ANNIndex", int]:
+        index = ANNIndex(self.dim, self.m, self.ef_construction, self.ef_search, self.build_batch,
+                         self.rebuild_seconds, self.path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One worker builds and saves while the rest wait, then load its file
+        with open(f"{self.path}.lock", "w") as lock:
+            await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX)
+            try:
+                if self._file_is_fresh():
+                    await asyncio.to_thread(index.load, self.path)
+                else:
+                    await index.build()
+                    await asyncio.to_thread(index.save, self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return index, index.index.get_current_count()  # type: ignore
+
+    def _apply(self, index: "ANNIndex", op: tuple):
+        if op[0] == "upsert":
+            index.upsert(*op[1:])
+        else:
+            index.remove(*op[1:])
+
+    def _swap(self, index: "ANNIndex"):
+        with self.lock.write():
+            self.index, self.deleted = index.index, index.deleted
+
+    async def build(self):
+        if hnswlib is None:
+            raise RuntimeError("hnswlib is not installed")
+
+        print("Building ANN index...")
+        index = self._new_index(self.build_batch)
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(
+                select(Movie.movie_id, Movie.embedding)
+                .where(Movie.embedding.isnot(None))
+                .execution_options(yield_per=self.build_batch)
+            )
+            async for rows in result.partitions():
+                ids = np.array([row.movie_id for row in rows], dtype=np.int64)
+                vectors = np.array([row.embedding for row in rows], dtype=np.float32)
+                needed = index.get_current_count() + len(ids)
+                if needed > index.get_max_elements():
+                    index.resize_index(max(needed, index.get_max_elements() * 2))
+                # Graph insertion is the slow part of the build
+                await asyncio.to_thread(index.add_items, vectors, ids)
+
+        self.index = index
+        self.deleted = set()
+        print(f"ANN index built ({index.get_current_count()} movies).")
+
+    def load(self, path: str = ANN_INDEX_PATH):
+        if hnswlib is None:
+            raise RuntimeError("hnswlib is not installed")
+
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        index.load_index(path)
+        index.set_ef(self.ef_search)
+        self.index = index
+        # Deleted labels stay in the saved graph, so their ids are kept alongside it
+        deleted_path = f"{path}.deleted.npy"
+        self.deleted = set(np.load(deleted_path).tolist()) if os.path.exists(deleted_path) else set()
+
+    def save(self, path: str = ANN_INDEX_PATH):
+        if self.index is None:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written under per-process names and swapped in, so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        tmp_deleted_path = f"{path}.deleted.{os.getpid()}.tmp.npy"
+        with self.lock.read():
+            self.index.save_index(tmp_path)
+            np.save(tmp_deleted_path, np.array(sorted(self.deleted), dtype=np.int64))
+        os.replace(tmp_deleted_path, f"{path}.deleted.npy")
+        os.replace(tmp_path, path)
+
+    def query(self, embedding, top_n: int = 10, exclude_id: Optional[int] = None) -> list[tuple[int, float]]:
+        """Return (movie_id, cosine similarity) pairs, best first."""
+        with self.lock.read():
+            if self.index is None:
+                raise RuntimeError("ANN index not initialized. Call start() first")
+
+            # Deleted labels still count towards the index size but are never returned
+            count = self.index.get_current_count() - len(self.deleted)
+            if count <= 0:
+                return []
+
+            # Ask for one extra neighbour so excluding the query movie still yields top_n
+            k = min(top_n + (1 if exclude_id is not None else 0), count)
+            vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+            labels, distances = self.index.knn_query(vector, k=k)
+
+        neighbours = [
+            (int(label), 1.0 - float(distance))
+            for label, distance in zip(labels[0], distances[0])
+            if label != exclude_id
+        ]
+        return neighbours[:top_n]
+
+    def upsert(self, movie_id: int, embedding):
+        with self.lock.write():
+            if self.index is None:
+                return
+            self._ensure_capacity(1)
+            # add_items on an existing label replaces its vector (and un-deletes it)
+            self.index.add_items(np.asarray(embedding, dtype=np.float32).reshape(1, -1), np.array([movie_id]))
+            self.deleted.discard(movie_id)
+
+    def remove(self, movie_id: int):
+        with self.lock.write():
+            if self.index is None:
+                return
+            try:
+                self.index.mark_deleted(movie_id)
+                self.deleted.add(movie_id)
+            except RuntimeError:
+                # Label was never indexed (e.g. movie without an embedding)
+                pass
+
+    async def publish_upsert(self, movie_id: int, embedding):
+        """Apply an edit here and on every other worker."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._record("upsert", movie_id, vector)
+        # The write lock waits for running queries, so not on the event loop
+        await asyncio.to_thread(self.upsert, movie_id, vector)
+        await redis_cache.publish_event(ann_upsert=[movie_id, vector.tolist()])
+
+    async def publish_remove(self, movie_id: int):
+        self._record("remove", movie_id)
+        await asyncio.to_thread(self.remove, movie_id)
+        await redis_cache.publish_event(ann_remove=[movie_id])
+
+    def _on_event(self, payload: dict):
+        if "ann_upsert" in payload:
+            movie_id, vector = payload["ann_upsert"]
+            vector = np.asarray(vector, dtype=np.float32)
+            self._record("upsert", movie_id, vector)
+            self._spawn(asyncio.to_thread(self.upsert, movie_id, vector))
+        for movie_id in payload.get("ann_remove", ()):
+            self._record("remove", movie_id)
+            self._spawn(asyncio.to_thread(self.remove, movie_id))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+ann_index = ANNIndex()
+
+async def rebuild_index_file(path: str = ANN_INDEX_PATH):
+    """Offline rebuild of the saved index from the current catalog."""
+    index = ANNIndex()
+    await index.build()
+    index.save(path)
+    print(f"ANN index saved to {path}.")
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_index_file())
@@ -0,0 +1,179 @@
+import os
+import heapq
+import asyncio
+from bisect import bisect_left, insort
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy.future import select
+from backend.database.database import AsyncSessionLocal
+from backend.models.models import Movie
+from backend.services.periodic_index import PeriodicIndex
+
+load_dotenv()
+AUTOCOMPLETE_REBUILD_SECONDS = float(os.getenv("AUTOCOMPLETE_REBUILD_SECONDS", 900))
+# Titles are also indexed from each of their first few words ("dark knight" -> "The Dark Knight")
+MAX_WORD_KEYS = 6
+# Prefixes shorter than this match too many titles to rank by scanning, so
+# their best matches are kept precomputed
+SHORT_PREFIX = 3
+MAX_SUGGESTIONS = 20
+# Longer prefixes matching more keys than this are precomputed as well, so a
+# scan never has to visit more
+SCAN_LIMIT = 5000
+# Sorts after any character a normalised title can contain
+KEY_END = "\U0010ffff"
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+def title_keys(title: str) -> list[str]:
+    words = normalize(title).split(" ")
+    return list(dict.fromkeys(" ".join(words[i:]) for i in range(min(len(words), MAX_WORD_KEYS))))
+
+class AutocompleteIndex(PeriodicIndex):
+    """In-process typeahead over movie titles: a sorted key array searched with bisect.
+
+    Ranked by (vote_count, vote_average). Rebuilt from the database on an
+    interval so edits made through other workers show up eventually.
+    """
+
+    name = "Autocomplete index"
+
+    def __init__(self, rebuild_seconds: float = AUTOCOMPLETE_REBUILD_SECONDS) -> None:
+        super().__init__(rebuild_seconds)
+        self.keys: list[tuple[str, int]] = []
+        self.movies: dict[int, tuple[str, int, float]] = {}
+        # prefix -> its best MAX_SUGGESTIONS movie_ids, for short and for heavy prefixes
+        self.top: dict[str, list[int]] = {}
+
+    def is_ready(self) -> bool:
+        return bool(self.movies)
+
+    def _rank(self, movie_id: int) -> tuple[int, float]:
+        _, vote_count, vote_average = self.movies[movie_id]
+        return vote_count, vote_average
+
+    def _top_prefixes(self, movie_id: int) -> set[str]:
+        prefixes = set()
+        for key in title_keys(self.movies[movie_id][0]):
+            for length in range(1, len(key) + 1):
+                prefix = key[:length]
+                # Heavy prefixes only ever extend heavy ones
+                if length >= SHORT_PREFIX and prefix not in self.top:
+                    break
+                prefixes.add(prefix)
+        return prefixes
+
+    def _add_top(self, movie_id: int):
+        for prefix in self._top_prefixes(movie_id):
+            best = self.top.setdefault(prefix, [])
+            if movie_id not in best:
+                best.append(movie_id)
+                best.sort(key=self._rank, reverse=True)
+                del best[MAX_SUGGESTIONS:]
+
+    def _build(self, rows: list[tuple[int, str, int, float]]):
+        self.movies = {movie_id: (title, vote_count or 0, vote_average or 0.0) for movie_id, title, vote_count, vote_average in rows}
+        self.keys = sorted((key, movie_id) for movie_id, (title, _, _) in self.movies.items() for key in title_keys(title))
+
+        # Visiting movies best-first fills each short prefix with its top matches
+        self.top = {}
+        for movie_id in sorted(self.movies, key=self._rank, reverse=True):
+            for key in title_keys(self.movies[movie_id][0]):
+                for length in range(1, SHORT_PREFIX):
+                    best = self.top.setdefault(key[:length], [])
+                    if len(best) < MAX_SUGGESTIONS and movie_id not in best:
+                        best.append(movie_id)
+
+        # Then one prefix length at a time, inside the runs that were still too
+        # long to scan, rank every prefix matching more than SCAN_LIMIT keys
+        runs = [(0, len(self.keys))]
+        length = SHORT_PREFIX
+        while runs:
+            heavy = []
+            for start, end in runs:
+                i = start
+                while i < end:
+                    key = self.keys[i][0]
+                    if len(key) < length:
+                        i += 1
+                        continue
+                    prefix = key[:length]
+                    j = bisect_left(self.keys, (prefix + KEY_END,), i, end)
+                    if j - i > SCAN_LIMIT:
+                        self.top[prefix] = heapq.nlargest(
+                            MAX_SUGGESTIONS, {movie_id for _, movie_id in self.keys[i:j]}, key=self._rank
+                        )
+                        heavy.append((i, j))
+                    i = j
+            runs = heavy
+            length += 1
+
+    def search(self, prefix: str, limit: int = 10) -> list[dict]:
+        prefix = normalize(prefix)
+        limit = min(limit, MAX_SUGGESTIONS)
+        if not prefix:
+            return []
+
+        if len(prefix) < SHORT_PREFIX or prefix in self.top:
+            movie_ids = self.top.get(prefix, [])[:limit]
+        else:
+            candidates = set()
+            i = bisect_left(self.keys, (prefix,))
+            end = min(i + SCAN_LIMIT, len(self.keys))
+            while i < end and self.keys[i][0].startswith(prefix):
+                candidates.add(self.keys[i][1])
+                i += 1
+            movie_ids = heapq.nlargest(limit, candidates, key=self._rank)
+
+        return [{"movie_id": movie_id, "title": self.movies[movie_id][0]} for movie_id in movie_ids]
+
+    def upsert(self, movie_id: int, title: str, vote_count: Optional[int], vote_average: Optional[float]):
+        self._record("upsert", movie_id, title, vote_count, vote_average)
+        self._remove(movie_id)
+        self.movies[movie_id] = (title, vote_count or 0, vote_average or 0.0)
+        for key in title_keys(title):
+            insort(self.keys, (key, movie_id))
+        self._add_top(movie_id)
+
+    def remove(self, movie_id: int):
+        self._record("remove", movie_id)
+        self._remove(movie_id)
+
+    def _remove(self, movie_id: int):
+        if movie_id not in self.movies:
+            return
+        for key in title_keys(self.movies[movie_id][0]):
+            i = bisect_left(self.keys, (key, movie_id))
+            if i < len(self.keys) and self.keys[i] == (key, movie_id):
+                del self.keys[i]
+        # Top lists refill on the next rebuild
+        for prefix in self._top_prefixes(movie_id):
+            best = self.top.get(prefix)
+            if best and movie_id in best:
+                best.remove(movie_id)
+        del self.movies[movie_id]
+
+    async def _load(self) -> tuple["AutocompleteIndex", int]:
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(
+                select(Movie.movie_id, Movie.title, Movie.vote_count, Movie.vote_average)
+                .execution_options(yield_per=10000)
+            )
+            rows = [tuple(row) async for row in result]
+
+        index = AutocompleteIndex(self.rebuild_seconds)
+        # Sorting every title key takes seconds on a large catalog
+        await asyncio.to_thread(index._build, rows)
+        return index, len(rows)
+
+    def _apply(self, index: "AutocompleteIndex", op: tuple):
+        if op[0] == "upsert":
+            index.upsert(*op[1:])
+        else:
+            index.remove(*op[1:])
+
+    def _swap(self, index: "AutocompleteIndex"):
+        self.keys, self.movies, self.top = index.keys, index.movies, index.top
+
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,249 @@
+import os
+import json
+import fcntl
+import asyncio
+import numpy as np
+from typing import Iterable, Optional
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.future import select
+from backend.database.database import AsyncSessionLocal
+from backend.models.models import Movie
+from backend.services.ranking import exclusion_mask, top_k
+
+load_dotenv()
+EMBEDDING_MATRIX_PATH = os.getenv("EMBEDDING_MATRIX_PATH", "data/embeddings.npy")
+# None (exact float32), "float16" or "int8"
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION") or None
+EMBEDDING_RESCORE_FACTOR = int(os.getenv("EMBEDDING_RESCORE_FACTOR", 4))
+SCORING_CHUNK_ROWS = 65536
+
+if EMBEDDING_QUANTIZATION not in (None, "float16", "int8"):
+    raise ValueError(f"Unknown EMBEDDING_QUANTIZATION: {EMBEDDING_QUANTIZATION}")
+
+def _sidecar_paths(path: str) -> tuple[str, str]:
+    base = path[:-4] if path.endswith(".npy") else path
+    return f"{base}_ids.npy", f"{base}_meta.json"
+
+def quantized_paths(path: str, quantization: str) -> tuple[str, str]:
+    base = path[:-4] if path.endswith(".npy") else path
+    return f"{base}_{quantization}.npy", f"{base}_{quantization}_scales.npy"
+
+def quantize_matrix(path: str = EMBEDDING_MATRIX_PATH, quantization: str = "int8"):
+    """Write a float16 or int8 copy of a pre-normalised matrix.
+
+    int8 rows are stored as round(x / scale) with one float32 scale per row
+    (max |x| / 127), so a dot product is (q8 @ query) * scale.
+    """
+    source = np.load(path, mmap_mode="r")
+    matrix_path, scales_path = quantized_paths(path, quantization)
+    dtype = np.float16 if quantization == "float16" else np.int8
+
+    # Per-process temp names so concurrent writers never share a file
+    tmp_matrix_path = f"{matrix_path}.{os.getpid()}.tmp"
+    tmp_scales_path = f"{scales_path}.{os.getpid()}.tmp.npy"
+    quantized = np.lib.format.open_memmap(tmp_matrix_path, mode="w+", dtype=dtype, shape=source.shape)
+    scales = np.ones(source.shape[0], dtype=np.float32)
+    for start in range(0, source.shape[0], SCORING_CHUNK_ROWS):
+        block = np.asarray(source[start:start + SCORING_CHUNK_ROWS], dtype=np.float32)
+        if quantization == "int8":
+            block_scales = np.maximum(np.abs(block).max(axis=1), 1e-12) / 127.0
+            quantized[start:start + len(block)] = np.round(block / block_scales[:, None]).astype(np.int8)
+            scales[start:start + len(block)] = block_scales
+        else:
+            quantized[start:start + len(block)] = block.astype(np.float16)
+
+    quantized.flush()
+    del quantized
+    np.save(tmp_scales_path, scales)
+    os.replace(tmp_matrix_path, matrix_path)
+    os.replace(tmp_scales_path, scales_path)
+    print(f"{quantization} embedding matrix written to {matrix_path}.")
+
+async def build_embedding_matrix(path: str = EMBEDDING_MATRIX_PATH, normalize: bool = True, batch_size: int = 1000,
+                                 quantization: Optional[str] = EMBEDDING_QUANTIZATION):
+    """Write every movie embedding into one contiguous float32 .npy file.
+
+    Rows are ordered by movie_id and the ids are saved next to the matrix, so
+    row lookup is a binary search. Files are swapped in atomically; running
+    workers keep their old mapping until they reload.
+    """
+    ids_path, meta_path = _sidecar_paths(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    dim = Movie.__table__.c.embedding.type.dim
+    async with AsyncSessionLocal() as session:
+        # Count and stream from the same snapshot so the row count matches
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        count = await session.scalar(
+            select(func.count()).select_from(Movie).where(Movie.embedding.isnot(None))
+        ) or 0
+
+        # Per-process temp names so concurrent builds never share a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(count, dim))
+        movie_ids = np.empty(count, dtype=np.int64)
+
+        result = await session.stream(
+            select(Movie.movie_id, Movie.embedding)
+            .where(Movie.embedding.isnot(None))
+            .order_by(Movie.movie_id)
+            .execution_options(yield_per=batch_size)
+        )
+        row = 0
+        async for rows in result.partitions():
+            block = np.array([r.embedding for r in rows], dtype=np.float32)
+            if normalize:
+                block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+            matrix[row:row + len(rows)] = block
+            movie_ids[row:row + len(rows)] = [r.movie_id for r in rows]
+            row += len(rows)
+            print(f"Wrote {row}/{count} embeddings...")
+
+    matrix.flush()
+    del matrix
+
+    tmp_ids_path = f"{ids_path}.{os.getpid()}.tmp.npy"
+    tmp_meta_path = f"{meta_path}.{os.getpid()}.tmp"
+    np.save(tmp_ids_path, movie_ids)
+    with open(tmp_meta_path, "w") as f:
+        json.dump({"count": count, "dim": dim, "normalized": normalize}, f)
+
+    os.replace(tmp_path, path)
+    os.replace(tmp_ids_path, ids_path)
+    os.replace(tmp_meta_path, meta_path)
+    print(f"Embedding matrix written to {path} ({count} movies).")
+
+    if quantization:
+        if not normalize:
+            raise ValueError("Quantized matrices require normalize=True")
+        quantize_matrix(path, quantization)
+
+class EmbeddingStore:
+    """Read-only view of the catalog embeddings, memory-mapped from disk.
+
+    Every worker maps the same file, so the page cache holds a single copy of
+    the matrix no matter how many processes serve requests.
+
+    The matrix is a snapshot: movies created or re-embedded through the API
+    are not in it (as neighbours, or with their new vector) until it is
+    rebuilt with `python -m backend.services.embedding_store` and the workers
+    restart. Use the ann or pgvector backend when edits must show up at once.
+    """
+
+    def __init__(self, path: str = EMBEDDING_MATRIX_PATH, quantization: Optional[str] = EMBEDDING_QUANTIZATION,
+                 rescore_factor: int = EMBEDDING_RESCORE_FACTOR) -> None:
+        self.path = path
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.matrix: Optional[np.ndarray] = None
+        self.movie_ids: Optional[np.ndarray] = None
+        self.norms: Optional[np.ndarray] = None
+        self.quantized: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+
+    def is_ready(self) -> bool:
+        return self.matrix is not None
+
+    async def startup(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Every worker starts at once; one builds the files while the rest wait for them
+        with open(f"{self.path}.lock", "w") as lock:
+            await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(self.path):
+                    print("Embedding matrix not found, building it...")
+                    await build_embedding_matrix(self.path, quantization=self.quantization)
+                elif self.quantization and not os.path.exists(quantized_paths(self.path, self.quantization)[0]):
+                    quantize_matrix(self.path, self.quantization)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self.load()
+
+    def load(self):
+        ids_path, meta_path = _sidecar_paths(self.path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        self.matrix = np.load(self.path, mmap_mode="r")
+        self.movie_ids = np.load(ids_path, mmap_mode="r")
+        # Raw vectors need their norms for cosine scores; normalised ones don't
+        self.norms = None if meta["normalized"] else np.maximum(np.linalg.norm(self.matrix, axis=1), 1e-12)
+
+        if self.quantization:
+            if not meta["normalized"]:
+                raise RuntimeError("Quantized scoring requires a pre-normalised embedding matrix")
+            matrix_path, scales_path = quantized_paths(self.path, self.quantization)
+            self.quantized = np.load(matrix_path, mmap_mode="r")
+            self.scales = np.load(scales_path, mmap_mode="r")
+        print(f"Embedding matrix mapped from {self.path} ({meta['count']} movies).")
+
+    def rows(self, movie_ids: Iterable[int]) -> np.ndarray:
+        """Map movie ids to matrix rows, -1 for ids missing from the matrix."""
+        assert self.movie_ids is not None
+        ids = np.fromiter(movie_ids, dtype=np.int64)
+        rows = np.searchsorted(self.movie_ids, ids)
+        found = rows < len(self.movie_ids)
+        found[found] = self.movie_ids[rows[found]] == ids[found]
+        return np.where(found, rows, -1)
+
+    def vector(self, movie_id: int) -> Optional[np.ndarray]:
+        assert self.matrix is not None
+        row = self.rows([movie_id])[0]
+        return None if row < 0 else np.array(self.matrix[row])
+
+    def similarities(self, embedding) -> np.ndarray:
+        """Cosine similarity of the embedding against every row."""
+        assert self.matrix is not None
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.matrix @ query
+        if self.norms is not None:
+            scores /= self.norms
+        return scores
+
+    def approximate_similarities(self, embedding) -> np.ndarray:
+        """Cosine similarity against the quantized rows."""
+        assert self.quantized is not None and self.scales is not None
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        # Upcast one block at a time so the full matrix is never copied to float32
+        scores = np.empty(self.quantized.shape[0], dtype=np.float32)
+        for start in range(0, self.quantized.shape[0], SCORING_CHUNK_ROWS):
+            block = np.asarray(self.quantized[start:start + SCORING_CHUNK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        if self.quantization == "int8":
+            scores *= self.scales
+        return scores
+
+    def nearest(self, embedding, top_n: int, exclude_ids: Iterable[int] = (), rescore: bool = True) -> list[tuple[int, float]]:
+        assert self.movie_ids is not None and self.matrix is not None
+        quantized = self.quantized is not None
+        scores = self.approximate_similarities(embedding) if quantized else self.similarities(embedding)
+        exclude = exclusion_mask(len(scores), self.rows(exclude_ids))
+
+        if quantized and rescore:
+            # Re-rank a wider candidate set with the exact float32 rows
+            candidates, _ = top_k(scores, top_n * self.rescore_factor, exclude)
+            candidates = np.sort(candidates)
+            query = np.asarray(embedding, dtype=np.float32).ravel()
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            exact = self.matrix[candidates] @ query
+
+            indices, top_scores = top_k(exact, top_n)
+            return [(int(self.movie_ids[candidates[i]]), float(score)) for i, score in zip(indices, top_scores)]
+
+        indices, top_scores = top_k(scores, top_n, exclude)
+        return [(int(self.movie_ids[i]), float(score)) for i, score in zip(indices, top_scores)]
+
+
+embedding_store = EmbeddingStore()
+
+if __name__ == "__main__":
+    asyncio.run(build_embedding_matrix())
@@ -0,0 +1,117 @@
+import os
+import re
+import time
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, exists, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from backend.models.models import Genre, MovieGenre, Movie
+
+load_dotenv()
+GENRE_MAP_TTL = float(os.getenv("GENRE_MAP_TTL", 300))
+# Unknown names trigger a reload at most this often
+GENRE_MAP_MIN_RELOAD = 5.0
+
+class GenreMap:
+    """Process-wide genre name -> ids map, refreshed every GENRE_MAP_TTL seconds.
+
+    Names are matched case-insensitively; rows that differ only in case
+    (e.g. "Science Fiction" and "science fiction") map to all of their ids.
+    """
+
+    def __init__(self, ttl: float = GENRE_MAP_TTL) -> None:
+        self.ttl = ttl
+        self.ids: dict[str, list[int]] = {}
+        self.loaded_at = 0.0
+
+    async def load(self, db: AsyncSession):
+        result = await db.execute(select(Genre.name, Genre.id))
+        ids: dict[str, list[int]] = {}
+        for name, genre_id in result.all():
+            ids.setdefault(name.strip().lower(), []).append(genre_id)
+        self.ids = ids
+        self.loaded_at = time.monotonic()
+
+    async def resolve(self, names: list[str], db: AsyncSession) -> dict[str, list[int]]:
+        age = time.monotonic() - self.loaded_at
+        if age > self.ttl or (age > GENRE_MAP_MIN_RELOAD and any(name not in self.ids for name in names)):
+            await self.load(db)
+        return {name: self.ids[name] for name in names if name in self.ids}
+
+
+genre_map = GenreMap()
+
+class GenreService:
+
+    @staticmethod
+    def normalize(genre: Optional[str], match_all: bool = False) -> Optional[str]:
+        """Canonical genre filter used in cache keys: "action,drama" (any) or "action+drama" (all)."""
+        names = sorted({name.strip().lower() for name in re.split(r"[,+]", genre or "") if name.strip()})
+        if not names:
+            return None
+        return ("+" if match_all else ",").join(names)
+
+    @staticmethod
+    def parse(genre: Optional[str]) -> tuple[list[str], bool]:
+        if not genre:
+            return [], False
+        match_all = "+" in genre
+        return [name for name in re.split(r"[,+]", genre) if name], match_all
+
+    @staticmethod
+    def tags(genre: Optional[str]) -> list[str]:
+        names, _ = GenreService.parse(genre)
+        return [f"genre:{name}" for name in names] or ["genre:all"]
+
+    @staticmethod
+    async def filter_clause(genre: Optional[str], db: AsyncSession):
+        """WHERE clause restricting Movie to a normalised genre filter, or None for no filter.
+
+        Each genre is an EXISTS semi-join served by the (genre_id, movie_id) index.
+        """
+        names, match_all = GenreService.parse(genre)
+        if not names:
+            return None
+
+        ids = await genre_map.resolve(names, db)
+        if not ids or (match_all and len(ids) < len(names)):
+            raise HTTPException(status_code=404, detail="No movies found")
+
+        if match_all:
+            return and_(*(
+                exists().where(MovieGenre.movie_id == Movie.movie_id, MovieGenre.genre_id.in_(genre_ids))
+                for genre_ids in ids.values()
+            ))
+        genre_ids = [genre_id for genre_ids in ids.values() for genre_id in genre_ids]
+        return exists().where(MovieGenre.movie_id == Movie.movie_id, MovieGenre.genre_id.in_(genre_ids))
+
+    @staticmethod
+    async def sync_movie_genres(movie_id: int, genre: Optional[str], db: AsyncSession):
+        """Mirror a movie's comma separated genre string into movie_genre (caller commits)."""
+        # lower-cased name -> spelling used if the genre has to be created
+        names: dict[str, str] = {}
+        for name in (genre or "").split(","):
+            if name.strip():
+                names.setdefault(name.strip().lower(), name.strip())
+        await db.execute(delete(MovieGenre).where(MovieGenre.movie_id == movie_id))
+        if not names:
+            return
+
+        # genres.name is unique case-sensitively, so reuse existing rows whatever their case
+        lowered = func.lower(Genre.name)
+        result = await db.execute(select(lowered).where(lowered.in_(list(names))))
+        new_names = set(names) - set(result.scalars().all())
+        if new_names:
+            await db.execute(pg_insert(Genre).values(
+                [{"name": names[name]} for name in sorted(new_names)]
+            ).on_conflict_do_nothing())
+
+        result = await db.execute(select(Genre.id).where(lowered.in_(list(names))))
+        await db.execute(pg_insert(MovieGenre).values(
+            [{"movie_id": movie_id, "genre_id": genre_id} for genre_id in result.scalars().all()]
+        ).on_conflict_do_nothing())
+        # New genres must be resolvable right away
+        genre_map.loaded_at = 0.0
@@ -0,0 +1,122 @@
+import os
+import time
+import asyncio
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.database.database import AsyncSessionLocal
+from backend.models.models import Movie
+from backend.cache.bloom_filter import BloomFilter
+from backend.cache.redis_cache import redis_cache
+from backend.services.periodic_index import PeriodicIndex
+
+load_dotenv()
+MOVIE_FILTER_REBUILD_SECONDS = float(os.getenv("MOVIE_FILTER_REBUILD_SECONDS", 600))
+MOVIE_FILTER_ERROR_RATE = float(os.getenv("MOVIE_FILTER_ERROR_RATE", 0.01))
+# Filter misses double-checked against the database per second, for movies
+# inserted by scripts since the last rebuild; misses beyond that are refused
+MOVIE_FILTER_CONFIRMS_PER_SECOND = int(os.getenv("MOVIE_FILTER_CONFIRMS_PER_SECOND", 5))
+# Room for movies created between rebuilds
+MOVIE_FILTER_HEADROOM = 1.25
+
+class MovieIdFilter(PeriodicIndex):
+    """In-memory Bloom filter of existing movie_ids, rebuilt periodically.
+
+    Lets lookups for IDs that were never created fail without touching Redis
+    or Postgres. Movies created through the API are announced to every worker;
+    ones inserted by scripts are found by a rate-limited primary-key check
+    until the next rebuild. Deleted IDs stay in the filter until the next
+    rebuild and are handled by the negative cache instead.
+    """
+
+    name = "Movie id filter"
+
+    def __init__(self, rebuild_seconds: float = MOVIE_FILTER_REBUILD_SECONDS,
+                 error_rate: float = MOVIE_FILTER_ERROR_RATE) -> None:
+        super().__init__(rebuild_seconds)
+        self.error_rate = error_rate
+        self.bloom: Optional[BloomFilter] = None
+        self.rejected = 0
+        self.confirmed = 0
+        self.confirm_window = 0
+        self.confirms_in_window = 0
+
+    def is_ready(self) -> bool:
+        return self.bloom is not None
+
+    def might_exist(self, movie_id: int) -> bool:
+        # Until the first build everything might exist
+        if self.bloom is None or movie_id in self.bloom:
+            return True
+        self.rejected += 1
+        return False
+
+    def _take_confirm(self) -> bool:
+        window = int(time.monotonic())
+        if window != self.confirm_window:
+            self.confirm_window, self.confirms_in_window = window, 0
+        if self.confirms_in_window >= MOVIE_FILTER_CONFIRMS_PER_SECOND:
+            return False
+        self.confirms_in_window += 1
+        return True
+
+    async def exists(self, movie_id: int, db: AsyncSession) -> bool:
+        """False when the id is known not to exist; filter misses get a budgeted DB check."""
+        if self.might_exist(movie_id):
+            return True
+        if not self._take_confirm():
+            return False
+        if await db.scalar(select(Movie.movie_id).where(Movie.movie_id == movie_id)) is None:
+            return False
+        self.confirmed += 1
+        self.add(movie_id)
+        return True
+
+    def add(self, movie_id: int):
+        if self.bloom is not None:
+            self.bloom.add(movie_id)
+        self._record(movie_id)
+
+    async def announce(self, movie_id: int):
+        """Add a newly created id here and in every other worker's filter."""
+        self.add(movie_id)
+        await redis_cache.publish_event(movie_ids=[movie_id])
+
+    def _on_event(self, payload: dict):
+        for movie_id in payload.get("movie_ids", ()):
+            self.add(movie_id)
+
+    def _build(self, movie_ids: list[int]) -> BloomFilter:
+        bloom = BloomFilter(int(len(movie_ids) * MOVIE_FILTER_HEADROOM), self.error_rate)
+        for movie_id in movie_ids:
+            bloom.add(movie_id)
+        return bloom
+
+    async def _load(self) -> tuple[BloomFilter, int]:
+        async with AsyncSessionLocal() as session:
+            result = await session.stream_scalars(select(Movie.movie_id).execution_options(yield_per=10000))
+            movie_ids = [movie_id async for movie_id in result]
+        # Millions of blake2b hashes, so off the event loop
+        return await asyncio.to_thread(self._build, movie_ids), len(movie_ids)
+
+    def _apply(self, bloom: BloomFilter, op: tuple):
+        bloom.add(op[0])
+
+    def _swap(self, bloom: BloomFilter):
+        self.bloom = bloom
+
+    def start(self):
+        redis_cache.add_listener(self._on_event)
+        super().start()
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "ids": self.bloom.count if self.bloom is not None else 0,
+            "rejected": self.rejected,
+            "confirmed": self.confirmed,
+        }
+
+
+movie_id_filter = MovieIdFilter()
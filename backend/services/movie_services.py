@@ -1,17 +1,81 @@
+import json
+import base64
 import numpy as np
 import logging
+from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from backend.models.models import Movie, Poster
-from backend.database.schemas import MovieCreate, MovieRecommendation
-from sklearn.metrics.pairwise import cosine_similarity
+from sqlalchemy import func, or_, text, tuple_
+from backend.models.models import Movie
+from backend.database.database import AsyncSessionLocal
+from backend.database.schemas import MovieCreate, MovieRecommendation, MovieResponse, MovieDetailResponse
 from backend.cache.redis_cache import redis_cache
-from backend.auth.utils import to_dict
+from backend.services.ann_index import ann_index
+from backend.services.embedding_store import embedding_store
+from backend.services.neighbor_services import NeighborService
+from backend.services.similarity import SIMILARITY_BACKEND, nearest_movies, hydrate_recommendations, cosine_top_n
+from backend.services.scoring_executor import scoring_executor
+from backend.services.movie_id_filter import movie_id_filter
+from backend.services.autocomplete import autocomplete_index
+from backend.services.genre_services import GenreService
+from backend.auth.utils import projection, primary_poster, row_to_dict
 from fastapi import HTTPException, Query
-from typing import Optional
+from typing import Awaitable, Callable, Optional, TypeVar
+from pydantic import TypeAdapter
 
 logger = logging.getLogger(__name__)
 
+movie_list_adapter = TypeAdapter(list[MovieResponse])
+
+T = TypeVar("T")
+
+# sort name -> (sort key, descending); each has a (sort key, movie_id) index
+MOVIE_SORTS = {
+    "id": (Movie.movie_id, False),
+    "popularity": (Movie.vote_count, True),
+    "release_date": (func.coalesce(Movie.release_date, text("'0001-01-01'::date")), True),
+    "title": (Movie.title, False),
+}
+
+def escape_like(text: str) -> str:
+    # User input must not add LIKE wildcards of its own; pair with escape="\\"
+    return text.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_")
+
+def encode_cursor(sort: str, sort_value, movie_id: int) -> str:
+    if isinstance(sort_value, date):
+        sort_value = sort_value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([sort, sort_value, movie_id]).encode()).decode().rstrip("=")
+
+def _is_int(value) -> bool:
+    # movie_id and vote_count are Postgres integers
+    return isinstance(value, int) and not isinstance(value, bool) and -2**31 <= value < 2**31
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    # Cursors come from clients, so anything that doesn't round-trip is a 400, never a DB error
+    try:
+        cursor_sort, sort_value, movie_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if cursor_sort != sort:
+            raise HTTPException(status_code=400, detail="Cursor belongs to a different sort order.")
+        if sort == "release_date":
+            sort_value = date.fromisoformat(sort_value)
+        elif sort == "title":
+            if not isinstance(sort_value, str):
+                raise ValueError("title cursor must hold a string")
+        elif not _is_int(sort_value):
+            raise ValueError(f"{sort} cursor must hold an integer")
+        if not _is_int(movie_id):
+            raise ValueError("cursor movie_id must be an integer")
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return sort_value, movie_id
+
+async def with_session(load: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    # Single-flight loads outlive the request that started them, so they get their own session
+    async with AsyncSessionLocal() as db:
+        return await load(db)
+
 class MovieService:
 
     @staticmethod
@@ -24,39 +88,95 @@ class MovieService:
         try:
             db_movie = Movie(**movie.model_dump())
             db.add(db_movie)
+            await db.flush()
+            # Genre filters read movie_genre, so keep it in step with the genre string
+            await GenreService.sync_movie_genres(db_movie.movie_id, db_movie.genre, db) #type:ignore
             await db.commit()
             await db.refresh(db_movie)
-            return db_movie
         except Exception as e:
             await db.rollback()
             raise HTTPException(status_code=500, detail=f"An error occured: {str(e)}")
 
+        await movie_id_filter.announce(db_movie.movie_id) #type:ignore
+        autocomplete_index.upsert(db_movie.movie_id, db_movie.title, db_movie.vote_count, db_movie.vote_average) #type:ignore
+        if db_movie.embedding is not None:
+            await ann_index.publish_upsert(db_movie.movie_id, db_movie.embedding) #type:ignore
+            await MovieService._refresh_neighbors(db_movie.movie_id, db_movie.embedding, db) #type:ignore
+
+        # A new movie changes the unfiltered listings and its genres' listings
+        await MovieService._invalidate_movie(db_movie.movie_id, db_movie.genre, listings=True) #type:ignore
+        return db_movie
+
+    @staticmethod
+    def _genre_tags(genre: Optional[str]) -> list[str]:
+        # Movie.genre is a comma separated list, e.g. "Action, Drama"
+        return [f"genre:{name.strip().lower()}" for name in (genre or "").split(",") if name.strip()]
+
+    @staticmethod
+    async def _invalidate_movie(movie_id: int, *genres: Optional[str], listings: bool = False):
+        """Drop every cached response built from the movie or from its genres' listings."""
+        tags = [f"movie:{movie_id}"]
+        for genre in genres:
+            tags.extend(MovieService._genre_tags(genre))
+        if listings:
+            tags.append("genre:all")
+        try:
+            await redis_cache.invalidate_tags(*tags)
+        except Exception as e:
+            # The write already committed; entries still expire by TTL
+            logger.error(f"Cache invalidation failed for movie {movie_id}: {e}")
+
+    @staticmethod
+    async def _reject_unknown(movie_id: int, db: AsyncSession):
+        # IDs that were never created are refused without touching Redis
+        if not await movie_id_filter.exists(movie_id, db):
+            raise HTTPException(status_code=404, detail="Movie not found.")
+
     @staticmethod
     async def get_movie(movie_id: int, db: AsyncSession):
+        await MovieService._reject_unknown(movie_id, db)
         cache_key = f"movie_{movie_id}"
 
         #Checking redis for stored cache
         cached_movie = await redis_cache.get_cache(cache_key)
         if cached_movie:
             return cached_movie
-        
-        result = await db.execute(select(Movie, Poster.image_path)
-                                  .join(Poster, Poster.movie_id == Movie.movie_id, isouter=True)
+
+        # Recently confirmed misses (e.g. deleted movies) skip the database
+        if await redis_cache.is_missing(cache_key):
+            raise HTTPException(status_code=404, detail="Movie not found.")
+
+        # Concurrent misses for the same movie share one query
+        return await redis_cache.single_flight(
+            cache_key, lambda: with_session(lambda db: MovieService._load_movie(movie_id, cache_key, db))
+        )
+
+    @staticmethod
+    async def get_movie_response(movie_id: int, db: AsyncSession) -> tuple[str, bytes]:
+        """(etag, body) of the rendered MovieDetailResponse, cached as bytes."""
+        await MovieService._reject_unknown(movie_id, db)
+        cached = await redis_cache.get_response(f"movie_{movie_id}")
+        if cached:
+            return cached
+
+        movie = await MovieService.get_movie(movie_id, db)
+        body = MovieDetailResponse.model_validate(movie).model_dump_json().encode()
+        return await redis_cache.set_response(f"movie_{movie_id}", body, expire=3600, tags=[f"movie:{movie_id}"])
+
+    @staticmethod
+    async def _load_movie(movie_id: int, cache_key: str, db: AsyncSession):
+        result = await db.execute(select(*projection(Movie, MovieDetailResponse), primary_poster())
                                   .where(Movie.movie_id == movie_id))
         row = result.first()
         if not row:
+            # Tagged so creating the movie clears it
+            await redis_cache.mark_missing(cache_key, expire=60, tags=[f"movie:{movie_id}"])
             raise HTTPException(status_code=404, detail="Movie not found.")
 
-        movie, poster_url = row  
-        try:
-            movie_dict = to_dict(movie)
-        except Exception as e:
-            logger.error("to_dict failed: ", e)
-            raise 
-        movie_dict["poster_url"] = poster_url 
+        movie_dict = row_to_dict(row)
 
         try:
-            await redis_cache.set_cache(cache_key, movie_dict, expire=3600)
+            await redis_cache.set_cache(cache_key, movie_dict, expire=3600, tags=[f"movie:{movie_id}"])
         except Exception as e:
             logger.error("set_cache failed: ", e)
             raise 
@@ -65,45 +185,122 @@ class MovieService:
     @staticmethod
     async def get_movies(genre: Optional[str], db: AsyncSession, page: int=1, per_page: int=50):
         try:
-            cached_movies = await redis_cache.get_movies_cache(genre,page,per_page)
+            # Stale pages are served as-is while one refresh runs in the background
+            cached_movies = await redis_cache.get_movies_cache(
+                genre, page, per_page, refresh=lambda: MovieService._refresh_movies_page(genre, page, per_page)
+            )
 
             if cached_movies:
                 return cached_movies 
 
-            query = select(Movie, Poster.image_path).join(Poster, Poster.movie_id == Movie.movie_id, isouter=True)
-            if genre:
-                query = query.where(Movie.genre.ilike(f"%{genre}%"))
-            
-            query = query.offset((page - 1) * per_page).limit(per_page)
-            result = await db.execute(query)
-            movies = result.all()
-
-            if not movies:
-                raise HTTPException(status_code=404, detail="No movies found")
-
-            movies_dict = []
-            seen_movies = {}
-            
-            for movie, poster_url in movies:
-                movie_id = movie.movie_id
-                if movie.movie_id not in seen_movies:
-                    movie_dict = to_dict(movie)
-                    movie_dict["poster_url"] = poster_url
-                    seen_movies[movie_id] = movie_dict
-                    movies_dict.append(movie_dict)
-
-                else:
-                    if "poster_urls" not in seen_movies[movie_id]:
-                        seen_movies[movie_id]["poster_urls"] = []
-                    seen_movies[movie_id]["poster_urls"].append(poster_url)
-
-            await redis_cache.set_movies_cache(genre, movies_dict, expire=3600, per_page=per_page)
-
-            return movies_dict
-        
+            cache_key = f"{redis_cache.movies_key_prefix(genre, per_page)}:page:{page}"
+            return await redis_cache.single_flight(
+                cache_key, lambda: with_session(lambda db: MovieService._load_movies_page(genre, db, page, per_page))
+            )
+
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+    @staticmethod
+    async def get_movies_response(genre: Optional[str], db: AsyncSession, page: int = 1,
+                                  per_page: int = 50) -> tuple[str, bytes]:
+        """(etag, body) of the rendered movie list page, cached as bytes."""
+        cache_key = f"movies:{genre if genre else 'all'}:page:{page}:{per_page}"
+        cached = await redis_cache.get_response(cache_key)
+        if cached:
+            return cached
+
+        movies = await MovieService.get_movies(genre, db, page, per_page)
+        body = movie_list_adapter.dump_json(movie_list_adapter.validate_python(movies))
+        tags = [*GenreService.tags(genre), *(f"movie:{movie['movie_id']}" for movie in movies)]
+        # Short-lived so a stale-while-revalidate refresh of the page shows up quickly
+        return await redis_cache.set_response(cache_key, body, expire=60, tags=tags)
+
+    @staticmethod
+    async def get_movies_after(genre: Optional[str], db: AsyncSession, sort: str = "id",
+                               cursor: Optional[str] = None, per_page: int = 50) -> tuple[list[dict], Optional[str]]:
+        """Keyset page of movies after `cursor`, with the cursor of the next page (None at the end)."""
+        if sort not in MOVIE_SORTS:
+            raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(MOVIE_SORTS)}")
+
+        cache_key = f"{redis_cache.movies_key_prefix(genre, per_page)}:sort:{sort}:after:{cursor or 'start'}"
+        page = await redis_cache.get_cache(cache_key)
+        if not page:
+            page = await redis_cache.single_flight(
+                cache_key,
+                lambda: with_session(lambda db: MovieService._load_movies_after(genre, db, sort, cursor, per_page, cache_key))
+            )
+        return page["movies"], page["next_cursor"]  #type:ignore
+
+    @staticmethod
+    async def _load_movies_after(genre: Optional[str], db: AsyncSession, sort: str, cursor: Optional[str],
+                                 per_page: int, cache_key: str) -> dict:
+        sort_key, descending = MOVIE_SORTS[sort]
+        query = select(*projection(Movie, MovieResponse), sort_key.label("sort_key"), primary_poster())
+        genre_clause = await GenreService.filter_clause(genre, db)
+        if genre_clause is not None:
+            query = query.where(genre_clause)
+
+        if cursor:
+            # Seek straight to the cursor through the (sort key, movie_id) index
+            sort_value, last_id = decode_cursor(cursor, sort)
+            if sort == "id":
+                query = query.where(Movie.movie_id > last_id)
+            elif descending:
+                query = query.where(tuple_(sort_key, Movie.movie_id) < tuple_(sort_value, last_id))
+            else:
+                query = query.where(tuple_(sort_key, Movie.movie_id) > tuple_(sort_value, last_id))
+
+        if descending:
+            query = query.order_by(sort_key.desc(), Movie.movie_id.desc())
+        else:
+            query = query.order_by(sort_key, Movie.movie_id)
+        result = await db.execute(query.limit(per_page))
+        movies = result.all()
+
+        if not movies and not cursor:
+            raise HTTPException(status_code=404, detail="No movies found")
+
+        movies_dict = [row_to_dict(row) for row in movies]
+        for movie_dict in movies_dict:
+            del movie_dict["sort_key"]
+
+        next_cursor = encode_cursor(sort, movies[-1].sort_key, movies[-1].movie_id) if movies and len(movies) == per_page else None
+        page = {"movies": movies_dict, "next_cursor": next_cursor}
+
+        tags = [*GenreService.tags(genre), *(f"movie:{movie['movie_id']}" for movie in movies_dict)]
+        await redis_cache.set_cache(cache_key, page, expire=600, tags=tags)
+        return page
+
+    @staticmethod
+    async def _refresh_movies_page(genre: Optional[str], page: int, per_page: int):
+        # The request's session is gone by the time this runs
+        async with AsyncSessionLocal() as db:
+            await MovieService._load_movies_page(genre, db, page, per_page)
+
+    @staticmethod
+    async def _load_movies_page(genre: Optional[str], db: AsyncSession, page: int, per_page: int):
+        query = select(*projection(Movie, MovieResponse), primary_poster())
+        genre_clause = await GenreService.filter_clause(genre, db)
+        if genre_clause is not None:
+            query = query.where(genre_clause)
+        
+        # Same order as the preloaded pages; deep pages should use the cursor API
+        query = query.order_by(Movie.movie_id).offset((page - 1) * per_page).limit(per_page)
+        result = await db.execute(query)
+        movies = result.all()
+
+        if not movies:
+            raise HTTPException(status_code=404, detail="No movies found")
+
+        movies_dict = [row_to_dict(row) for row in movies]
+
+        await redis_cache.set_movies_cache(genre, movies_dict, expire=3600, per_page=per_page, start_page=page,
+                                           soft_ttl=600)
+
+        return movies_dict
+
+
     @staticmethod
     async def update_movie(movie_id: int, movie: MovieCreate, db: AsyncSession):
         result = await db.execute(select(Movie).where(Movie.movie_id == movie_id))
@@ -111,13 +308,39 @@ class MovieService:
         if not db_movie:
             raise HTTPException(status_code=404, detail="Movie not found.")
         
-        for key, value in movie.model_dump(exclude_unset=True).items():
+        old_genre = db_movie.genre
+        changes = movie.model_dump(exclude_unset=True)
+        for key, value in changes.items():
             setattr(db_movie, key, value)
+        if "genre" in changes:
+            await GenreService.sync_movie_genres(movie_id, db_movie.genre, db) #type:ignore
         
         await db.commit()
         await db.refresh(db_movie)
+        autocomplete_index.upsert(movie_id, db_movie.title, db_movie.vote_count, db_movie.vote_average) #type:ignore
+
+        if "embedding" in changes:
+            if db_movie.embedding is None:
+                await ann_index.publish_remove(movie_id)
+            else:
+                await ann_index.publish_upsert(movie_id, db_movie.embedding)
+                await MovieService._refresh_neighbors(movie_id, db_movie.embedding, db)
+
+        if "genre" in changes and changes["genre"] != old_genre:
+            await MovieService._invalidate_movie(movie_id, old_genre, db_movie.genre) #type:ignore
+        else:
+            await MovieService._invalidate_movie(movie_id)
 
         return db_movie
+
+    @staticmethod
+    async def _refresh_neighbors(movie_id: int, embedding, db: AsyncSession):
+        # The movie is already committed, a failed refresh only leaves its neighbour list stale
+        try:
+            await NeighborService.refresh_movie(movie_id, embedding, db)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Neighbour refresh failed for movie {movie_id}: {e}")
     
     @staticmethod
     async def delete_movie(movie_id: int, db: AsyncSession):
@@ -127,12 +350,17 @@ class MovieService:
             raise HTTPException(status_code=404, detail="Movie not found")
         
         try:
+            genre = db_movie.genre
             await db.delete(db_movie)
             await db.commit()
 
         except Exception as e:
             await db.rollback()
             raise HTTPException(status_code=500, detail=f"An error occured: {str(e)}")
+
+        await ann_index.publish_remove(movie_id)
+        autocomplete_index.remove(movie_id)
+        await MovieService._invalidate_movie(movie_id, genre, listings=True) #type:ignore
         
     @staticmethod
     async def search_movies(db: AsyncSession, q: Optional[str] = None, genre: Optional[str] = None):
@@ -141,12 +369,24 @@ class MovieService:
         if cached_movies:
             return cached_movies
 
-        query = select(Movie, Poster.image_path).join(Poster, Poster.movie_id == Movie.movie_id, isouter=True)
+        query = select(*projection(Movie, MovieResponse), primary_poster())
 
         if q:
-            query = query.where(Movie.title.ilike(f"%{q}%"))
-        if genre:
-            query = query.where(Movie.genre.ilike(f"%{genre}%"))
+            # Full-text matches on title/overview plus fuzzy and partial title matches,
+            # each served by a GIN index (search_vector, pg_trgm)
+            ts_query = func.websearch_to_tsquery("english", q)
+            query = query.where(or_(
+                Movie.search_vector.op("@@")(ts_query),
+                Movie.title.op("%")(q),
+                Movie.title.ilike(f"%{escape_like(q)}%", escape="\\"),
+            ))
+            relevance = func.ts_rank(Movie.search_vector, ts_query) + func.similarity(Movie.title, q)
+            query = query.order_by(relevance.desc(), Movie.movie_id)
+        else:
+            query = query.order_by(Movie.vote_count.desc(), Movie.movie_id)
+        genre_clause = await GenreService.filter_clause(genre, db)
+        if genre_clause is not None:
+            query = query.where(genre_clause)
 
         query = query.limit(12)  
         result = await db.execute(query)
@@ -155,83 +395,107 @@ class MovieService:
         if not movies:
             raise HTTPException(status_code=404, detail="No movies found")
 
-        movies_dict = []
-        seen_movies = {}
+        movies_dict = [row_to_dict(row) for row in movies]
 
-        for movie, poster_url in movies:
-            movie_id = movie.movie_id
-            if movie_id not in seen_movies:
-                movie_dict = to_dict(movie)
-                movie_dict["poster_url"] = poster_url
-                seen_movies[movie_id] = movie_dict
-                movies_dict.append(movie_dict)
+        tags = [*GenreService.tags(genre), *(f"movie:{movie['movie_id']}" for movie in movies_dict)]
+        await redis_cache.set_cache(cache_key, movies_dict, expire=600, tags=tags)
 
-            else:
-                if "poster_urls" not in seen_movies[movie_id]:
-                    seen_movies[movie_id]["poster_urls"] = []
-                seen_movies[movie_id]["poster_urls"].append(poster_url)
+        return movies_dict
 
-        await redis_cache.set_cache(cache_key, movies_dict, expire=600)
+    @staticmethod
+    async def autocomplete(db: AsyncSession, q: str, limit: int = 10) -> list[dict]:
+        # Served from memory; the database is only used until the index is first built
+        if autocomplete_index.is_ready():
+            return autocomplete_index.search(q, limit)
 
-        return movies_dict
+        result = await db.execute(
+            select(Movie.movie_id, Movie.title)
+            .where(Movie.title.ilike(f"{escape_like(q)}%", escape="\\"))
+            .order_by(Movie.vote_count.desc(), Movie.vote_average.desc())
+            .limit(limit)
+        )
+        return [{"movie_id": movie_id, "title": title} for movie_id, title in result.all()]
 
     @staticmethod
     async def get_similar_movies(movie_id: int, db: AsyncSession, top_n: int = 10):
+        await MovieService._reject_unknown(movie_id, db)
 
         cache_key = f"similar_movies:{movie_id}"
         cached_similar_movies = await redis_cache.get_cache(cache_key)
         if cached_similar_movies:
             return cached_similar_movies[:top_n]
 
-        # Retrieve the target movie
-        movie = await db.get(Movie, movie_id)
-        if not movie or movie.embedding is None:
+        if await redis_cache.is_missing(cache_key):
             raise HTTPException(status_code=404, detail="Movie not found or missing embedding")
 
-        target_embedding = np.array(movie.embedding).reshape(1, -1)
-
-        # Fetch all movies with embeddings
-        result = await db.execute(
-            select(Movie, Poster.image_path)
-            .join(Poster, Poster.movie_id == Movie.movie_id, isouter=True)
-            .where(Movie.embedding.isnot(None))
+        similar_movies = await redis_cache.single_flight(
+            cache_key, lambda: with_session(lambda db: MovieService._compute_similar_movies(movie_id, cache_key, db, top_n))
         )
-        movies = result.all()
-
-        if not movies:
-            raise HTTPException(status_code=404, detail="No movies with embeddings available")
+        return similar_movies[:top_n]
 
-        movie_list = []
-        embedding_matrix = []
-        posters_dict = {}  # Store poster URLs
+    @staticmethod
+    async def _compute_similar_movies(movie_id: int, cache_key: str, db: AsyncSession, top_n: int):
+        # Precomputed neighbour lists are served with a single primary-key lookup
+        neighbours = await NeighborService.get_neighbors(movie_id, db, top_n)
+
+        if neighbours is None:
+            use_store = SIMILARITY_BACKEND == "memmap" and embedding_store.is_ready()
+
+            # The shared matrix already holds the target vector, so skip loading the ORM row
+            target = embedding_store.vector(movie_id) if use_store else None
+            if target is not None:
+                # The snapshot can outlive a deleted movie or cleared embedding, so confirm the row
+                exists = await db.scalar(
+                    select(Movie.movie_id).where(Movie.movie_id == movie_id, Movie.embedding.isnot(None))
+                )
+                if exists is None:
+                    await redis_cache.mark_missing(cache_key, expire=60, tags=[f"movie:{movie_id}"])
+                    raise HTTPException(status_code=404, detail="Movie not found or missing embedding")
+            else:
+                # Retrieve the target movie
+                movie = await db.get(Movie, movie_id)
+                if not movie or movie.embedding is None:
+                    # Tagged so creating the movie or adding an embedding clears it
+                    await redis_cache.mark_missing(cache_key, expire=60, tags=[f"movie:{movie_id}"])
+                    raise HTTPException(status_code=404, detail="Movie not found or missing embedding")
+                target = movie.embedding
+
+            if use_store:
+                neighbours = await scoring_executor.run(embedding_store.nearest, target, top_n, [movie_id])
+            elif SIMILARITY_BACKEND == "pgvector":
+                neighbours = await nearest_movies(db, target, top_n, Movie.movie_id != movie_id)
+            elif SIMILARITY_BACKEND == "ann" and ann_index.is_ready():
+                neighbours = await scoring_executor.run(ann_index.query, target, top_n, movie_id)
+            else:
+                neighbours = await MovieService._scan_similar(movie_id, target, top_n, db)
 
-        for m, poster_url in movies:
-            if m.movie_id != movie_id:
-                movie_list.append(m)
-                embedding_matrix.append(m.embedding)
-                posters_dict[m.movie_id] = poster_url  # Store poster URL for each movie
+        similar_movies = await hydrate_recommendations(neighbours, db)
 
-        if not embedding_matrix:
-            raise HTTPException(status_code=404, detail="No valid movie embeddings found")
+        # Cache results
+        listed_similar_movies = [rec.model_dump() for rec in similar_movies]
+        tags = [f"movie:{movie_id}", *(f"movie:{rec.movie_id}" for rec in similar_movies)]
+        await redis_cache.set_cache(cache_key, listed_similar_movies, expire=1800, tags=tags)
 
-        embedding_matrix = np.array(embedding_matrix)
+        return similar_movies
 
-        similarities = cosine_similarity(target_embedding, embedding_matrix)[0]
-        sorted_indices = np.argsort(similarities)[::-1][:top_n]
+    @staticmethod
+    async def _scan_similar(movie_id: int, target, top_n: int, db: AsyncSession) -> list[tuple[int, float]]:
+        # Exact scan over every embedding; display fields are hydrated for the winners only
+        result = await db.execute(
+            select(Movie.movie_id, Movie.embedding)
+            .where(Movie.embedding.isnot(None))
+        )
+        rows = result.all()
 
-        similar_movies = [
-            MovieRecommendation(
-                movie_id=movie_list[i].movie_id,
-                title=movie_list[i].title,
-                genre=movie_list[i].genre,
-                score=float(similarities[i]),
-                poster_url=posters_dict.get(movie_list[i].movie_id)  
-            )
-            for i in sorted_indices
-        ]
+        if not rows:
+            raise HTTPException(status_code=404, detail="No movies with embeddings available")
 
-        # Cache results
-        listed_similar_movies = [rec.model_dump() for rec in similar_movies]
-        await redis_cache.set_cache(cache_key, listed_similar_movies, expire=1800)
+        movie_ids = np.array([row.movie_id for row in rows])
+        exclude = movie_ids == movie_id
+        if exclude.all():
+            raise HTTPException(status_code=404, detail="No valid movie embeddings found")
 
-        return similar_movies
+        indices, similarities = await scoring_executor.run(
+            cosine_top_n, target, [row.embedding for row in rows], top_n, exclude
+        )
+        return [(int(movie_ids[i]), float(score)) for i, score in zip(indices, similarities)]
@@ -0,0 +1,138 @@
+import os
+import time
+import asyncio
+from datetime import datetime, timezone
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from backend.database.database import AsyncSessionLocal
+from backend.models.models import Movie, MovieNeighbor
+from backend.services.embedding_store import EmbeddingStore, EMBEDDING_MATRIX_PATH, build_embedding_matrix
+from backend.services.similarity import nearest_movies
+from backend.services.ranking import top_k_batch
+
+load_dotenv()
+NEIGHBORS_K = int(os.getenv("NEIGHBORS_K", 50))
+# Each in-flight block holds a BLOCK_ROWS x catalog score matrix
+BLOCK_ROWS = 256
+
+def _block_neighbours(store: EmbeddingStore, start: int, end: int, k: int) -> tuple[np.ndarray, np.ndarray]:
+    # numpy releases the GIL in the matmul, so blocks scale across threads
+    assert store.matrix is not None
+    scores = np.asarray(store.matrix[start:end], dtype=np.float32) @ store.matrix.T
+    if store.norms is not None:
+        scores /= store.norms[start:end, None] * store.norms[None, :]
+    scores[np.arange(end - start), np.arange(start, end)] = -np.inf
+    return top_k_batch(scores, min(k, scores.shape[1] - 1))
+
+class NeighborService:
+
+    @staticmethod
+    async def get_neighbors(movie_id: int, db: AsyncSession, top_n: int) -> Optional[list[tuple[int, float]]]:
+        # Single primary-key lookup into the precomputed table
+        row = await db.get(MovieNeighbor, movie_id)
+        if row is None or len(row.neighbor_ids) < top_n:  #type:ignore
+            return None
+        return list(zip(row.neighbor_ids, row.scores))[:top_n]  #type:ignore
+
+    @staticmethod
+    async def save_neighbors(rows: list[dict], db: AsyncSession, keep_newer: bool = False):
+        """Upsert neighbour lists; with keep_newer, rows updated after a row's updated_at are left alone."""
+        if not rows:
+            return
+        stmt = pg_insert(MovieNeighbor).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["movie_id"],
+            set_={"neighbor_ids": stmt.excluded.neighbor_ids, "scores": stmt.excluded.scores, "updated_at": stmt.excluded.updated_at},
+            where=(MovieNeighbor.updated_at < stmt.excluded.updated_at) if keep_newer else None
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    async def refresh_movie(movie_id: int, embedding, db: AsyncSession, k: int = NEIGHBORS_K):
+        """Recompute one movie's neighbours and merge it into theirs.
+
+        Lists that merely referenced the old vector keep their scores until the
+        next full build; deleted movies are dropped when results are hydrated.
+        """
+        neighbours = await nearest_movies(db, embedding, k, Movie.movie_id != movie_id)
+        now = datetime.now(timezone.utc)
+        rows = [{
+            "movie_id": movie_id,
+            "neighbor_ids": [neighbor_id for neighbor_id, _ in neighbours],
+            "scores": [score for _, score in neighbours],
+        }]
+
+        # Similarity is symmetric, so the movie may now belong in its neighbours' lists
+        result = await db.execute(
+            select(MovieNeighbor).where(MovieNeighbor.movie_id.in_([neighbor_id for neighbor_id, _ in neighbours]))
+        )
+        scores_by_id = dict(neighbours)
+        for row in result.scalars().all():
+            merged = {nid: score for nid, score in zip(row.neighbor_ids, row.scores) if nid != movie_id}  #type:ignore
+            merged[movie_id] = scores_by_id[row.movie_id]
+            ranked = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:k]
+            rows.append({
+                "movie_id": row.movie_id,
+                "neighbor_ids": [nid for nid, _ in ranked],
+                "scores": [score for _, score in ranked],
+            })
+
+        for row in rows:
+            row["updated_at"] = now
+        await NeighborService.save_neighbors(rows, db)
+        await db.commit()
+
+    @staticmethod
+    async def build_all(k: int = NEIGHBORS_K, block_rows: int = BLOCK_ROWS, workers: Optional[int] = None,
+                        matrix_path: str = EMBEDDING_MATRIX_PATH, reuse_matrix: bool = False):
+        """Fill movie_neighbors for the whole catalog from a fresh embedding matrix.
+
+        Rows are stamped with the snapshot time, so lists that refresh_movie
+        rewrites while the build runs are not overwritten with older vectors.
+        """
+        snapshot_at = datetime.now(timezone.utc)
+        if not reuse_matrix or not os.path.exists(matrix_path):
+            await build_embedding_matrix(matrix_path)
+        else:
+            snapshot_at = datetime.fromtimestamp(os.path.getmtime(matrix_path), timezone.utc)
+        store = EmbeddingStore(matrix_path, quantization=None)
+        store.load()
+        assert store.matrix is not None and store.movie_ids is not None
+
+        count = store.matrix.shape[0]
+        blocks = [(start, min(start + block_rows, count)) for start in range(0, count, block_rows)]
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            futures = [
+                loop.run_in_executor(executor, _block_neighbours, store, start, end, k)
+                for start, end in blocks
+            ]
+            for (start, end), future in zip(blocks, futures):
+                top, top_scores = await future
+                rows = [
+                    {
+                        "movie_id": int(store.movie_ids[start + i]),
+                        "neighbor_ids": store.movie_ids[top[i]].tolist(),
+                        "scores": top_scores[i].tolist(),
+                        "updated_at": snapshot_at,
+                    }
+                    for i in range(end - start)
+                ]
+                async with AsyncSessionLocal() as session:
+                    await NeighborService.save_neighbors(rows, session, keep_newer=True)
+                    await session.commit()
+
+                done += end - start
+                print(f"Neighbours built for {done}/{count} movies ({time.perf_counter() - start_time:.0f}s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(NeighborService.build_all())
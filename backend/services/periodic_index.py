@@ -0,0 +1,69 @@
+import time
+import asyncio
+from typing import Any, Optional
+
+class PeriodicIndex:
+    """Base for in-memory indexes rebuilt from the database on an interval.
+
+    Subclasses implement _load() (build a fresh state off the live one),
+    _apply() (replay one recorded edit onto it) and _swap() (make it live).
+    Edits recorded with _record() while a rebuild runs are replayed onto the
+    new state, so nothing made during the rebuild is lost.
+    """
+
+    name = "Index"
+
+    def __init__(self, rebuild_seconds: float) -> None:
+        self.rebuild_seconds = rebuild_seconds
+        self.task: Optional[asyncio.Task] = None
+        # Edits made while a rebuild is reading the table
+        self.pending: Optional[list[tuple]] = None
+
+    def _record(self, *op):
+        if self.pending is not None:
+            self.pending.append(op)
+
+    async def _load(self) -> tuple[Any, int]:
+        """Return the new state and the number of rows it was built from."""
+        raise NotImplementedError
+
+    def _apply(self, state, op: tuple):
+        raise NotImplementedError
+
+    def _swap(self, state):
+        raise NotImplementedError
+
+    async def rebuild(self):
+        start = time.perf_counter()
+        self.pending = []
+        try:
+            state, rows = await self._load()
+            for op in self.pending:
+                self._apply(state, op)
+            self._swap(state)
+        finally:
+            self.pending = None
+        print(f"{self.name} rebuilt: {rows} rows in {time.perf_counter() - start:.2f}s")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"{self.name} rebuild failed: {e}")
+            await asyncio.sleep(self.rebuild_seconds)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
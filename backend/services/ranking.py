@@ -0,0 +1,49 @@
+import numpy as np
+from typing import Iterable, Optional
+
+def exclusion_mask(size: int, rows: Iterable[int]) -> np.ndarray:
+    """Boolean mask over `size` candidates with the given rows set (negative rows are ignored)."""
+    mask = np.zeros(size, dtype=bool)
+    rows = np.fromiter(rows, dtype=np.int64)
+    mask[rows[rows >= 0]] = True
+    return mask
+
+def unpack_mask(bits: np.ndarray, size: int) -> np.ndarray:
+    # Masks can be stored packed (np.packbits) at one bit per candidate
+    return np.unpackbits(bits, count=size).astype(bool)
+
+def top_k(scores: np.ndarray, k: int, exclude: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+    """Indices and scores of the k highest scores, best first.
+
+    `exclude` is a boolean mask (or a packed bitset) of candidates to skip.
+    Uses argpartition, so only the k survivors are sorted.
+    """
+    indices, top_scores = top_k_batch(scores.reshape(1, -1), k, exclude)
+    valid = np.isfinite(top_scores[0])
+    return indices[0][valid], top_scores[0][valid]
+
+def top_k_batch(scores: np.ndarray, k: int, exclude: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise top_k over a (queries x candidates) score matrix.
+
+    `exclude` may be one mask shared by every query or one mask per query.
+    Excluded slots that still fall inside the top k come back as -inf.
+    """
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(scores.dtype)
+
+    if exclude is not None:
+        if exclude.dtype == np.uint8:
+            exclude = unpack_mask(exclude, n) if exclude.ndim == 1 else np.unpackbits(exclude, axis=1, count=n).astype(bool)
+        scores = np.where(exclude, -np.inf, scores)
+
+    if k < n:
+        indices = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        indices = np.broadcast_to(np.arange(n), scores.shape).copy()
+    top_scores = np.take_along_axis(scores, indices, axis=1)
+
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
@@ -3,11 +3,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import delete
 from sqlalchemy.orm import joinedload
-from sklearn.metrics.pairwise import cosine_similarity
 from fastapi import HTTPException
-from backend.models.models import User, Movie, Recommendation, WatchHistory, Poster
+from backend.models.models import User, Movie, Recommendation, WatchHistory, UserProfile
 from backend.cache.redis_cache import redis_cache
+from backend.database.database import AsyncSessionLocal
 from backend.database.schemas import MovieRecommendation, RecommendationResponse
+from backend.auth.utils import primary_poster
+from backend.services.embedding_store import embedding_store
+from backend.services.user_services import UserService
+from backend.services.similarity import SIMILARITY_BACKEND, nearest_movies, hydrate_recommendations, cosine_top_n
+from backend.services.scoring_executor import scoring_executor
 
 class RecommendationService:
 
@@ -17,57 +22,45 @@ class RecommendationService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # Get user's watch history with embeddings
-        result = await db.execute(
-            select(Movie)
-            .join(WatchHistory, WatchHistory.movie_id == Movie.movie_id)
-            .where(WatchHistory.user_id == user_id)
-        )
-        watched_movies = result.scalars().all()
-
-        if not watched_movies:
-            raise HTTPException(status_code=404, detail="No watch history found")
-
-        watched_embeddings = [
-            np.array(movie.embedding) for movie in watched_movies if movie.embedding is not None
-        ]
-        if not watched_embeddings:
+        # Profile is kept as a running sum by UserService.add_to_watch_history
+        profile = await db.get(UserProfile, user_id, populate_existing=True)
+        if profile is None:
+            profile = await UserService.rebuild_profile(user_id, db)
+        if profile is None:
             raise HTTPException(status_code=404, detail="No embeddings in watch history")
 
-        user_embedding = np.mean(watched_embeddings, axis=0).reshape(1, -1)
+        user_embedding = (np.array(profile.embedding_sum, dtype=np.float32) / profile.watch_count).reshape(1, -1)
+        watched_query = select(WatchHistory.movie_id).where(WatchHistory.user_id == user_id)
 
-        # Get all movies not yet watched
-        result = await db.execute(select(Movie))
-        all_movies = result.scalars().all()
-
-        # Ensure watched_movies is a list of Movie objects
-        watched_ids = set()
-        for m in watched_movies:
-            if hasattr(m, "movie_id"):
-                watched_ids.add(m.movie_id)
-
-        # Collect candidate movies
-        candidate_movies = []
-        candidate_embeddings = []
-        for movie in all_movies:
-            if (
-                hasattr(movie, "embedding") and movie.embedding is not None and
-                hasattr(movie, "movie_id") and movie.movie_id not in watched_ids
-            ):
-                candidate_movies.append(movie)
-                candidate_embeddings.append(movie.embedding)
-
-
-        if not candidate_embeddings:
+        if SIMILARITY_BACKEND == "pgvector":
+            # Rank and exclude watched movies inside Postgres
+            scored = await nearest_movies(db, user_embedding[0], top_n, Movie.movie_id.not_in(watched_query))
+        elif SIMILARITY_BACKEND == "memmap" and embedding_store.is_ready():
+            # Score against the shared matrix instead of loading every Movie row
+            watched_ids = set((await db.scalars(watched_query)).all())
+            scored = await scoring_executor.run(embedding_store.nearest, user_embedding[0], top_n, watched_ids)
+        else:
+            watched_ids = np.fromiter((await db.scalars(watched_query)).all(), dtype=np.int64)
+
+            # Only ids and vectors are needed to rank, watched movies are masked out
+            result = await db.execute(select(Movie.movie_id, Movie.embedding).where(Movie.embedding.isnot(None)))
+            rows = result.all()
+
+            if rows:
+                movie_ids = np.array([row.movie_id for row in rows])
+                indices, similarities = await scoring_executor.run(
+                    cosine_top_n, user_embedding, [row.embedding for row in rows], top_n, np.isin(movie_ids, watched_ids)
+                )
+                scored = [(int(movie_ids[i]), float(score)) for i, score in zip(indices, similarities)]
+            else:
+                scored = []
+
+        if not scored:
             raise HTTPException(status_code=404, detail="No new movies to recommend")
 
-        candidate_embeddings = np.array(candidate_embeddings)
-        similarities = cosine_similarity(user_embedding, candidate_embeddings)[0]
-        sorted_indices = np.argsort(similarities)[::-1][:top_n]
-
         recommendations = [
-            Recommendation(user_id=user_id, movie_id=candidate_movies[i].movie_id, score=float(similarities[i]))
-            for i in sorted_indices
+            Recommendation(user_id=user_id, movie_id=movie_id, score=score)
+            for movie_id, score in scored
         ]
 
         # Clean and commit
@@ -77,27 +70,10 @@ class RecommendationService:
         await db.flush() 
         await db.commit()
 
-        movie_ids = [rec.movie_id for rec in recommendations]
-        result = await db.execute(
-            select(Poster.movie_id, Poster.image_path)
-            .where(Poster.movie_id.in_(movie_ids))
-        )
-        poster_map = {mid: path for mid, path in result.all()}
-
         # Prepare cache
-        movie_lookup = {movie.movie_id: movie for movie in candidate_movies}
-
-        recommendations_dict = [
-            {
-                "movie_id": rec.movie_id,
-                "title": movie_lookup[rec.movie_id].title,
-                "genre": movie_lookup[rec.movie_id].genre,
-                "score": rec.score,
-                "poster_url": poster_map.get(rec.movie_id)
-            }
-            for rec in recommendations if rec.movie_id in movie_lookup
-        ]
-        await redis_cache.set_cache(f"recommendations:{user_id}", recommendations_dict, expire=1800)
+        recommended_movies = await hydrate_recommendations(scored, db)
+        recommendations_dict = [rec.model_dump() for rec in recommended_movies]
+        await redis_cache.set_cache(f"recommendations:{user_id}", recommendations_dict, expire=1800, soft_ttl=600)
 
         return {"message": "Personalized recommendations generated", "count": len(recommendations)}
 
@@ -107,16 +83,17 @@ class RecommendationService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # Try cache
-        cached = await redis_cache.get_cache(f"recommendations:{user_id}")
+        # Try cache; a stale list is returned while it is regenerated in the background
+        cached = await redis_cache.get_cache(
+            f"recommendations:{user_id}", refresh=lambda: RecommendationService._refresh_recommendations(user_id)
+        )
         if cached:
             return RecommendationResponse(user_id=user_id, recommendations=cached[:top_n])
 
         # Fallback to DB
         result = await db.execute(
-            select(Recommendation, Movie, Poster.image_path)
+            select(Recommendation, Movie, primary_poster())
             .join(Movie, Recommendation.movie_id == Movie.movie_id)
-            .join(Poster, Poster.movie_id == Movie.movie_id, isouter=True)
             .where(Recommendation.user_id == user_id)
             .order_by(Recommendation.score.desc())
             .limit(top_n)
@@ -138,9 +115,14 @@ class RecommendationService:
         ]
         listed_recommendations = [rec.model_dump() for rec in recommendations_list]
 
-        await redis_cache.set_cache(f"recommendations:{user_id}", listed_recommendations, expire=1800)
+        await redis_cache.set_cache(f"recommendations:{user_id}", listed_recommendations, expire=1800, soft_ttl=600)
         return RecommendationResponse(user_id=user_id, recommendations=recommendations_list)
 
+    @staticmethod
+    async def _refresh_recommendations(user_id: int):
+        async with AsyncSessionLocal() as db:
+            await RecommendationService.generate_recommendations(user_id, db)
+
     @staticmethod
     async def ensure_recommendations_exist(user_id: int, db: AsyncSession):
         cached = await redis_cache.get_cache(f"recommendations:{user_id}")
@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+load_dotenv()
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", 4))
+SCORING_MAX_QUEUE = int(os.getenv("SCORING_MAX_QUEUE", 64))
+SCORING_TIMEOUT = float(os.getenv("SCORING_TIMEOUT", 5.0))
+
+T = TypeVar("T")
+
+class ScoringExecutor:
+    """Thread pool for CPU-bound similarity scoring.
+
+    NumPy/BLAS release the GIL, so scoring runs in parallel with the event
+    loop instead of stalling every other request on the worker.
+    """
+
+    def __init__(self, workers: int = SCORING_WORKERS, max_queue: int = SCORING_MAX_QUEUE,
+                 timeout: float = SCORING_TIMEOUT) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    def _ensure_started(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring")
+            self.slots = asyncio.Semaphore(self.workers)
+
+    async def run(self, fn: Callable[..., T], *args, timeout: Optional[float] = None) -> T:
+        self._ensure_started()
+        assert self.executor is not None and self.slots is not None
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+
+        if self.slots.locked():
+            # Shed load instead of letting the backlog grow without bound
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Scoring queue is full. Try again later.")
+
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self.slots.acquire(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise HTTPException(status_code=504, detail="Scoring timed out.")
+            finally:
+                self.queued -= 1
+        else:
+            await self.slots.acquire()
+
+        self.running += 1
+        start = time.perf_counter()
+        future = loop.run_in_executor(self.executor, fn, *args)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), max(deadline - loop.time(), 0))
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPException(status_code=504, detail="Scoring timed out.")
+        finally:
+            # The slot is only freed once the thread is done, even after a timeout
+            future.add_done_callback(lambda _: self._release(start))
+
+    def _release(self, start: float):
+        assert self.slots is not None
+        self.running -= 1
+        self.busy_seconds += time.perf_counter() - start
+        self.slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            self.slots = None
+
+
+scoring_executor = ScoringExecutor()
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import text
+from sklearn.metrics.pairwise import cosine_similarity
+from typing import Optional
+from backend.models.models import Movie
+from backend.auth.utils import primary_poster
+from backend.database.schemas import MovieRecommendation
+from backend.services.ranking import top_k
+from backend.cache.redis_cache import redis_cache
+
+load_dotenv()
+# "ann": in-process HNSW index (exact scan until it is ready)
+# "pgvector": ORDER BY embedding <=> :target inside Postgres
+# "memmap": shared float32 matrix built by backend.services.embedding_store
+#   (a snapshot, API edits show up after a rebuild and restart)
+# "python": exact scan over every embedding in the worker
+SIMILARITY_BACKEND = os.getenv("SIMILARITY_BACKEND", "ann")
+PGVECTOR_EF_SEARCH = int(os.getenv("PGVECTOR_EF_SEARCH", 100))
+
+if SIMILARITY_BACKEND not in ("ann", "pgvector", "memmap", "python"):
+    raise ValueError(f"Unknown SIMILARITY_BACKEND: {SIMILARITY_BACKEND}")
+
+async def nearest_movies(db: AsyncSession, embedding, top_n: int, *exclusions) -> list[tuple[int, float]]:
+    """Rank movies by cosine similarity in Postgres, best first.
+
+    Extra positional arguments are WHERE clauses, e.g. the movie itself or the
+    user's watched movies, so excluded rows never leave the database.
+    """
+    # Filtered HNSW scans only see ef_search candidates, so keep it above top_n
+    await db.execute(text(f"SET LOCAL hnsw.ef_search = {max(PGVECTOR_EF_SEARCH, top_n)}"))
+
+    distance = Movie.embedding.cosine_distance(embedding)
+    result = await db.execute(
+        select(Movie.movie_id, distance.label("distance"))
+        .where(Movie.embedding.isnot(None), *exclusions)
+        .order_by(distance)
+        .limit(top_n)
+    )
+    return [(movie_id, 1.0 - float(dist)) for movie_id, dist in result.all()]
+
+def cosine_top_n(target, embeddings: list, top_n: int, exclude: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+    """Exact scan, returns the indices and similarities of the top_n best."""
+    matrix = np.array(embeddings, dtype=np.float32)
+    similarities = cosine_similarity(np.asarray(target, dtype=np.float32).reshape(1, -1), matrix)[0]
+    return top_k(similarities, top_n, exclude)
+
+async def hydrate_recommendations(scored: list[tuple[int, float]], db: AsyncSession) -> list[MovieRecommendation]:
+    # Fetch display fields for the ranked ids only, keeping the ranking order
+    if not scored:
+        return []
+
+    movie_ids = [movie_id for movie_id, _ in scored]
+    rows = {}
+
+    # Movie details already cached by get_movie are read in one MGET
+    cached = await redis_cache.mget_cache([f"movie_{movie_id}" for movie_id in movie_ids])
+    for movie_id, movie in zip(movie_ids, cached):
+        if isinstance(movie, dict):
+            rows[movie_id] = (movie["title"], movie["genre"], movie.get("poster_url"))
+
+    missing = [movie_id for movie_id in movie_ids if movie_id not in rows]
+    if missing:
+        result = await db.execute(
+            select(Movie.movie_id, Movie.title, Movie.genre, primary_poster())
+            .where(Movie.movie_id.in_(missing))
+        )
+        for movie_id, title, genre, poster_url in result.all():
+            rows[movie_id] = (title, genre, poster_url)
+
+    return [
+        MovieRecommendation(
+            movie_id=movie_id,
+            title=rows[movie_id][0],
+            genre=rows[movie_id][1],
+            score=score,
+            poster_url=rows[movie_id][2]
+        )
+        for movie_id, score in scored if movie_id in rows
+    ]
@@ -2,14 +2,14 @@ from datetime import datetime, timezone
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import update, func
 from sqlalchemy.orm import joinedload
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi import HTTPException
-from backend.models.models import User, WatchHistory, Movie, Poster
+from backend.models.models import User, WatchHistory, Movie, UserProfile
 from backend.auth.utils import to_dict
 from backend.database.schemas import UserCreate, UserRoleUpdate
-from backend.auth.utils import hash_password
+from backend.auth.utils import hash_password, primary_poster
 
 class UserService:
 
@@ -76,10 +76,9 @@ class UserService:
                     WatchHistory.watch_count,
                     Movie.movie_id,
                     Movie.title,
-                    Poster.image_path
+                    primary_poster()
                 )
                 .join(Movie, Movie.movie_id == WatchHistory.movie_id)
-                .outerjoin(Poster, Poster.movie_id == Movie.movie_id)
                 .where(WatchHistory.user_id == user_id)
                 .order_by(WatchHistory.watched_at.desc())
             )
@@ -91,7 +90,6 @@ class UserService:
                 raise HTTPException(status_code=404, detail="Watch history not found")
 
             history = []
-            seen = set()
 
             for row in rows:
                 (
@@ -103,9 +101,6 @@ class UserService:
                     poster_url
                 ) = row
 
-                if history_id in seen:
-                    continue
-
                 history.append({
                     "watched_at": watched_at,
                     "watch_count": watch_count,
@@ -116,8 +111,6 @@ class UserService:
                     }
                 })
 
-                seen.add(history_id)
-
             return history
 
         except Exception as e:
@@ -137,13 +130,66 @@ class UserService:
                 "watch_count": WatchHistory.watch_count + 1,
                 "watched_at": datetime.now(timezone.utc)
             }
-        )
+        ).returning(WatchHistory.watch_count)
 
         try:
-            await db.execute(stmt)
+            watch_count = (await db.execute(stmt)).scalar_one()
+            # Only a first watch adds a new movie to the profile mean
+            if watch_count == 1:
+                await UserService.add_to_profile(user_id, movie_id, db)
             await db.commit()
         except IntegrityError:
             await db.rollback()
             raise HTTPException(status_code=500, detail="Failed to add watch history")
 
-        return {"message": "Watch history updated successfully"}
\ No newline at end of file
+        return {"message": "Watch history updated successfully"}
+
+    @staticmethod
+    async def add_to_profile(user_id: int, movie_id: int, db: AsyncSession):
+        embedding = await db.scalar(select(Movie.embedding).where(Movie.movie_id == movie_id))
+        if embedding is None:
+            return
+
+        # O(d) running-sum update, the watch history itself is never re-read
+        result = await db.execute(
+            update(UserProfile)
+            .where(UserProfile.user_id == user_id)
+            .values(
+                embedding_sum=UserProfile.embedding_sum.op("+")(embedding),
+                watch_count=UserProfile.watch_count + 1,
+                updated_at=datetime.now(timezone.utc)
+            )
+        )
+        # No profile yet (or one never backfilled): build it from the whole
+        # history, which already includes this watch
+        if result.rowcount == 0:
+            await UserService.rebuild_profile(user_id, db)
+
+    @staticmethod
+    async def rebuild_profile(user_id: int, db: AsyncSession):
+        # Full recompute, only needed for users without a stored profile (commits)
+        result = await db.execute(
+            select(func.sum(Movie.embedding), func.count(Movie.movie_id))
+            .join(WatchHistory, WatchHistory.movie_id == Movie.movie_id)
+            .where(WatchHistory.user_id == user_id, Movie.embedding.isnot(None))
+        )
+        embedding_sum, watch_count = result.one()
+        if not watch_count:
+            return None
+
+        stmt = pg_insert(UserProfile).values(
+            user_id=user_id,
+            embedding_sum=embedding_sum,
+            watch_count=watch_count
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={
+                "embedding_sum": stmt.excluded.embedding_sum,
+                "watch_count": stmt.excluded.watch_count,
+                "updated_at": datetime.now(timezone.utc)
+            }
+        ).returning(UserProfile)
+        profile = (await db.execute(stmt)).scalar_one()
+        await db.commit()
+        return profile
\ No newline at end of file
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+from sqlalchemy import delete, exists, func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.future import select
+from backend.database.database import AsyncSessionLocal
+from backend.models.models import Movie, Recommendation, UserProfile, WatchHistory
+from backend.auth.utils import primary_poster
+from backend.cache.redis_cache import redis_cache
+from backend.services.embedding_store import EmbeddingStore, EMBEDDING_MATRIX_PATH, build_embedding_matrix
+from backend.services.ranking import top_k_batch
+
+CHECKPOINT_PATH = "data/batch_recommendations.checkpoint.json"
+CHUNK_USERS = 256
+TOP_N = 12
+CACHE_EXPIRE = 1800
+
+def load_checkpoint(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return json.load(f)["last_user_id"]
+
+def save_checkpoint(path: str, last_user_id: int):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump({"last_user_id": last_user_id}, f)
+    os.replace(f"{path}.tmp", path)
+
+async def backfill_profiles(session) -> int:
+    """Create profiles for users with watch history but no user_profiles row."""
+    missing = (
+        select(WatchHistory.user_id, func.sum(Movie.embedding), func.count(Movie.movie_id))
+        .join(Movie, Movie.movie_id == WatchHistory.movie_id)
+        .where(Movie.embedding.isnot(None), ~exists().where(UserProfile.user_id == WatchHistory.user_id))
+        .group_by(WatchHistory.user_id)
+    )
+    result = await session.execute(
+        pg_insert(UserProfile)
+        .from_select(["user_id", "embedding_sum", "watch_count"], missing)
+        .on_conflict_do_nothing()
+    )
+    await session.commit()
+    return result.rowcount
+
+async def score_chunk(store: EmbeddingStore, profiles: list[UserProfile], session, top_n: int):
+    """Return {user_id: [(movie_id, score), ...]} for one chunk of users."""
+    assert store.matrix is not None and store.movie_ids is not None
+    user_ids = [profile.user_id for profile in profiles]
+
+    # Mean profile vectors, normalised so a dot product is a cosine score
+    users = np.array([profile.embedding_sum for profile in profiles], dtype=np.float32)
+    users /= np.maximum(np.linalg.norm(users, axis=1, keepdims=True), 1e-12)
+
+    scores = users @ store.matrix.T
+    if store.norms is not None:
+        scores /= store.norms
+
+    # Mask every watched movie in one scatter
+    result = await session.execute(
+        select(WatchHistory.user_id, WatchHistory.movie_id)
+        .where(WatchHistory.user_id.in_(user_ids))
+    )
+    watched = result.all()
+    if watched:
+        user_rows = {user_id: i for i, user_id in enumerate(user_ids)}
+        rows = np.array([user_rows[user_id] for user_id, _ in watched])
+        cols = store.rows(movie_id for _, movie_id in watched)
+        scores[rows[cols >= 0], cols[cols >= 0]] = -np.inf
+
+    top, top_scores = top_k_batch(scores, top_n)
+
+    return {
+        user_id: [
+            (int(store.movie_ids[col]), float(score))
+            for col, score in zip(top[i], top_scores[i]) if np.isfinite(score)
+        ]
+        for i, user_id in enumerate(user_ids)
+    }
+
+async def write_chunk(session, ranked: dict[int, list[tuple[int, float]]]):
+    user_ids = list(ranked)
+    rows = [
+        {"user_id": user_id, "movie_id": movie_id, "score": score}
+        for user_id, scored in ranked.items() for movie_id, score in scored
+    ]
+
+    await session.execute(delete(Recommendation).where(Recommendation.user_id.in_(user_ids)))
+    if rows:
+        await session.execute(insert(Recommendation), rows)
+    await session.commit()
+
+    # One metadata query for every movie recommended in the chunk
+    movie_ids = {row["movie_id"] for row in rows}
+    result = await session.execute(
+        select(Movie.movie_id, Movie.title, Movie.genre, primary_poster())
+        .where(Movie.movie_id.in_(movie_ids))
+    )
+    movies = {
+        movie_id: {"title": title, "genre": genre, "poster_url": poster_url}
+        for movie_id, title, genre, poster_url in result.all()
+    }
+
+    await redis_cache.mset_with_ttl({
+        f"recommendations:{user_id}": [
+            {"movie_id": movie_id, "title": movies[movie_id]["title"], "genre": movies[movie_id]["genre"],
+             "score": score, "poster_url": movies[movie_id]["poster_url"]}
+            for movie_id, score in scored if movie_id in movies
+        ]
+        for user_id, scored in ranked.items()
+    }, expire=CACHE_EXPIRE, soft_ttl=600)
+
+async def run_batch(chunk_size: int = CHUNK_USERS, top_n: int = TOP_N, resume: bool = False,
+                    checkpoint_path: str = CHECKPOINT_PATH, matrix_path: str = EMBEDDING_MATRIX_PATH,
+                    reuse_matrix: bool = False):
+    """Refresh stored and cached recommendations for every user with a profile."""
+    # The matrix on disk may be weeks old, so score against a fresh snapshot by
+    # default; a resumed run keeps the snapshot it started with. Any quantized
+    # copy is rewritten too so its rows still line up for the web workers.
+    if not (reuse_matrix or resume) or not os.path.exists(matrix_path):
+        await build_embedding_matrix(matrix_path)
+    store = EmbeddingStore(matrix_path, quantization=None)
+    store.load()
+    # No preload or invalidation listener in a batch job
+    await redis_cache.connect(bare=True)
+
+    last_user_id = load_checkpoint(checkpoint_path) if resume else 0
+    async with AsyncSessionLocal() as session:
+        # Users are read from user_profiles, so anyone missing there would be skipped
+        created = await backfill_profiles(session)
+        if created:
+            print(f"Built {created} missing user profiles from watch history.")
+        total = await session.scalar(select(func.count()).select_from(UserProfile)) or 0
+        done = await session.scalar(
+            select(func.count()).select_from(UserProfile).where(UserProfile.user_id <= last_user_id)
+        ) or 0
+    if last_user_id:
+        print(f"Resuming after user {last_user_id} ({done}/{total} already done).")
+
+    start = time.perf_counter()
+    processed = 0
+    try:
+        while True:
+            async with AsyncSessionLocal() as session:
+                # Keyset over user_id so a restart continues from the checkpoint
+                result = await session.execute(
+                    select(UserProfile)
+                    .where(UserProfile.user_id > last_user_id, UserProfile.watch_count > 0)
+                    .order_by(UserProfile.user_id)
+                    .limit(chunk_size)
+                )
+                profiles = result.scalars().all()
+                if not profiles:
+                    break
+
+                ranked = await score_chunk(store, list(profiles), session, top_n)
+                await write_chunk(session, ranked)
+
+            last_user_id = profiles[-1].user_id
+            save_checkpoint(checkpoint_path, last_user_id)
+
+            processed += len(profiles)
+            elapsed = time.perf_counter() - start
+            rate = processed / elapsed if elapsed else 0.0
+            remaining = max(total - done - processed, 0)
+            eta = remaining / rate if rate else 0.0
+            print(f"Processed {done + processed}/{total} users ({rate:.0f} users/s, ETA {eta:.0f}s)")
+    finally:
+        await redis_cache.disconnect()
+
+    # A finished run starts from the beginning next time
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"Batch recommendations finished: {processed} users in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute recommendations for all users")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_USERS)
+    parser.add_argument("--top-n", type=int, default=TOP_N)
+    parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--reuse-matrix", action="store_true", help="score against the existing embedding matrix")
+    args = parser.parse_args()
+
+    asyncio.run(run_batch(args.chunk_size, args.top_n, args.resume, args.checkpoint, reuse_matrix=args.reuse_matrix))
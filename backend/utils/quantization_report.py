@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import numpy as np
+from backend.services.embedding_store import EmbeddingStore, EMBEDDING_MATRIX_PATH, quantize_matrix, quantized_paths
+
+# Sample movies used as queries and the k values to report
+SAMPLE_SIZE = 200
+TOP_KS = [10, 50]
+
+def recall_at_k(exact: list[tuple[int, float]], approx: list[tuple[int, float]]) -> float:
+    if not exact:
+        return 1.0
+    expected = {movie_id for movie_id, _ in exact}
+    return len(expected & {movie_id for movie_id, _ in approx}) / len(expected)
+
+def report(path: str = EMBEDDING_MATRIX_PATH):
+    exact_store = EmbeddingStore(path, quantization=None)
+    exact_store.load()
+    assert exact_store.matrix is not None and exact_store.movie_ids is not None
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(exact_store.movie_ids), size=min(SAMPLE_SIZE, len(exact_store.movie_ids)), replace=False)
+    queries = [(int(exact_store.movie_ids[row]), np.array(exact_store.matrix[row])) for row in sample]
+
+    print(f"{'mode':<18}{'MB':>10}" + "".join(f"{f'recall@{k}':>12}" for k in TOP_KS) + f"{'ms/query':>12}")
+
+    def run(name: str, store: EmbeddingStore, rescore: bool, size_mb: float):
+        recalls = {k: [] for k in TOP_KS}
+        elapsed = 0.0
+        for movie_id, vector in queries:
+            for k in TOP_KS:
+                exact = exact_store.nearest(vector, k, exclude_ids=[movie_id])
+                start = time.perf_counter()
+                approx = store.nearest(vector, k, exclude_ids=[movie_id], rescore=rescore)
+                elapsed += time.perf_counter() - start
+                recalls[k].append(recall_at_k(exact, approx))
+        elapsed = elapsed * 1000 / (len(queries) * len(TOP_KS))
+        print(f"{name:<18}{size_mb:>10.1f}" + "".join(f"{np.mean(recalls[k]):>12.4f}" for k in TOP_KS) + f"{elapsed:>12.2f}")
+
+    run("float32", exact_store, False, exact_store.matrix.nbytes / 1e6)
+    for quantization in ("float16", "int8"):
+        if not os.path.exists(quantized_paths(path, quantization)[0]):
+            quantize_matrix(path, quantization)
+        store = EmbeddingStore(path, quantization=quantization)
+        store.load()
+        assert store.quantized is not None and store.scales is not None
+        size_mb = (store.quantized.nbytes + (store.scales.nbytes if quantization == "int8" else 0)) / 1e6
+        run(quantization, store, False, size_mb)
+        run(f"{quantization}+rescore", store, True, size_mb)
+
+
+if __name__ == "__main__":
+    report(sys.argv[1] if len(sys.argv) > 1 else EMBEDDING_MATRIX_PATH)